@@ -1,13 +1,62 @@
-from fastapi import FastAPI, HTTPException, Query
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from core.database import get_db_connection
+from fastapi.responses import Response, StreamingResponse
+from core.async_database import async_pool_stats, async_pooled_connection, async_replica_pool_stats, close_async_pool
+from core.cache import CacheEntry, response_cache
+from core.compression import compress, negotiate_encoding
+from core.conditional import etag_for_encoding, is_not_modified, make_etag, matching_etag, to_utc, validator_headers
+from core.database import PoolTimeoutError, close_pool, get_pool, open_pools, pooled_connection, replica_pool_stats
+from core.events import change_feed
+from core.instrumentation import (
+    MULTIPROC_DIR, PrometheusMiddleware, SERIALIZE_SECONDS, observe_query, publish_snapshots, register_stats,
+    render_metrics, timed,
+)
+from core.replicas import ReadPin, ReplicaUnavailable, pinned_reads, read_pin, replica_router
+from core.serialization import dumps, get_row_encoder
+from core.shared_cache import CACHE_INVALIDATION_CHANNEL
+from core.singleflight import SingleFlight
+from core.slow_queries import slow_query_log
 from decimal import Decimal
+from typing import Annotated
+import aiomysql
+import base64
 import datetime
+import json
 import logging
+import os
+import pymysql
+import time
 
 logger = logging.getLogger("uvicorn.error")
 
-app = FastAPI(title="Cloud Metrics API", version="2.0.0")
+# DB_ASYNC=false keeps the PyMySQL pool, run in the threadpool, as the request path
+USE_ASYNC_DB = os.environ.get("DB_ASYNC", "true").lower() == "true"
+CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not USE_ASYNC_DB:
+        # aiomysql pools open their minimum on creation; the sync ones are warmed here
+        await asyncio.to_thread(open_pools, replica_router.hosts)
+    if response_cache.shared is not None:
+        await response_cache.shared.subscribe(CACHE_INVALIDATION_CHANNEL, on_cache_invalidation)
+    # Several gunicorn workers: each publishes its in-process stats for /metrics to merge
+    snapshots = asyncio.create_task(publish_snapshots()) if MULTIPROC_DIR else None
+    yield
+    if snapshots is not None:
+        snapshots.cancel()
+    if response_cache.shared is not None:
+        await response_cache.shared.close()
+    await change_feed.close()
+    await close_async_pool()
+    close_pool()
+
+
+app = FastAPI(title="Cloud Metrics API", version="2.0.0", lifespan=lifespan)
 
 # ------------------------------
 # CORS Setup
@@ -19,17 +68,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(PrometheusMiddleware)
 
 # -----------------------------
 # Allowed tables
 # -----------------------------
 ALLOWED_TABLES = {
-    "cloud_cost_monthly": {"date_column": "retrieved_at"},
-    "server_status_agg": {"date_column": "retrieved_at"},
+    "cloud_cost_monthly": {"date_column": "retrieved_at", "key_columns": ("cloud", "month_year", "service")},
+    "server_status_agg": {"date_column": "retrieved_at", "key_columns": ("cloud", "region", "az")},
 }
 
 ALLOWED_CLOUDS = {"AWS", "GCP", "AZURE"}
 
+# ?format=rows (list of objects, default) or ?format=columnar ({"columns": [...], "data": [[...]]})
+RowFormat = Annotated[str, Query(alias="format", pattern="^(rows|columnar)$")]
+
 # -----------------------------
 # Helpers
 # -----------------------------
@@ -41,7 +94,9 @@ def serialize_value(value):
     return value
 
 def get_date_range(months_back: int = 2):
-    today = datetime.datetime.utcnow()
+    # retrieved_at has second resolution, so whole seconds select the same rows and
+    # concurrent requests build identical params (see query_flight)
+    today = datetime.datetime.utcnow().replace(microsecond=0)
     first_day_this_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
     month = first_day_this_month.month - months_back
@@ -53,12 +108,29 @@ def get_date_range(months_back: int = 2):
 
     return start_date, today
 
-def fetch_table_rows_by_date(
+def normalize_cloud(cloud: str | None):
+    if not cloud:
+        return None
+    cloud_upper = cloud.strip().upper()
+    if cloud_upper not in ALLOWED_CLOUDS:
+        raise HTTPException(status_code=400, detail=f"Cloud must be one of {sorted(ALLOWED_CLOUDS)}")
+    return cloud_upper
+
+def build_rows_query(
     table_name: str,
     date_column: str = "retrieved_at",
     months_back: int = 2,
     cloud: str | None = None,
+    limit: int | None = None,
+    after: tuple | None = None,
 ):
+    """
+    Validate the request and return the (query, params) shared by the sync and async drivers.
+
+    With ``limit`` the rows are ordered by (date column, primary key) descending and
+    ``after`` - a decoded page cursor - continues strictly below that position (keyset
+    pagination), so every page is an index range read regardless of depth.
+    """
     if table_name not in ALLOWED_TABLES:
         raise HTTPException(status_code=400, detail=f"Table '{table_name}' is not allowed.")
 
@@ -66,46 +138,785 @@ def fetch_table_rows_by_date(
     if date_column != allowed_date_col:
         raise HTTPException(status_code=400, detail=f"Invalid date column for table '{table_name}'.")
 
-    cloud_filter = None
-    if cloud:
-        cloud_upper = cloud.strip().upper()
-        if cloud_upper not in ALLOWED_CLOUDS:
-            raise HTTPException(status_code=400, detail=f"Cloud must be one of {sorted(ALLOWED_CLOUDS)}")
-        cloud_filter = cloud_upper
+    cloud_filter = normalize_cloud(cloud)
+
+    start_date, end_date = get_date_range(months_back)
+
+    query = f"""
+        SELECT *
+        FROM {table_name}
+        WHERE {date_column} >= %s AND {date_column} <= %s
+    """
+    params = [start_date, end_date]
+
+    if cloud_filter:
+        query += " AND cloud = %s"
+        params.append(cloud_filter)
+
+    if limit is None:
+        query += f" ORDER BY {date_column} DESC"
+        return query, tuple(params)
+
+    key_columns = ALLOWED_TABLES[table_name]["key_columns"]
+    if after is not None:
+        # Expanded row comparison: MySQL turns the leading column into a range predicate
+        keys = ", ".join(key_columns)
+        marks = ", ".join(["%s"] * len(key_columns))
+        query += f" AND ({date_column} < %s OR ({date_column} = %s AND ({keys}) < ({marks})))"
+        params += [after[0], after[0], *after[1:]]
+
+    order = ", ".join(f"{column} DESC" for column in (date_column, *key_columns))
+    query += f" ORDER BY {order} LIMIT %s"
+    params.append(limit)
+
+    return query, tuple(params)
+
+def encode_page_cursor(table_name: str, columns, row) -> str:
+    """Opaque cursor holding the (date column, primary key) position of the last row served."""
+    table = ALLOWED_TABLES[table_name]
+    position = [row[columns.index(table["date_column"])].isoformat()]
+    position += [row[columns.index(column)] for column in table["key_columns"]]
+    payload = json.dumps([table_name, *position], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_page_cursor(table_name: str, cursor: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_table, retrieved_at, *keys = payload
+        position = (datetime.datetime.fromisoformat(retrieved_at), *keys)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if cursor_table != table_name or len(keys) != len(ALLOWED_TABLES[table_name]["key_columns"]):
+        raise HTTPException(status_code=400, detail="Cursor does not belong to this table.")
+    return position
+
+def encode_rows(table_name: str, description, rows):
+    """Driver rows -> RowSet of JSON-ready tuples, via the encoder compiled for this table's columns."""
+    started = time.perf_counter()
+    rowset = get_row_encoder(table_name, description).encode(rows)
+    SERIALIZE_SECONDS.labels("encode").observe(time.perf_counter() - started)
+    return rowset
+
+def render_rows(rowset, fmt: str = "rows") -> bytes:
+    """JSON body for a RowSet: a list of objects, or {"columns": [...], "data": [[...]]} when columnar."""
+    if fmt == "columnar":
+        return dumps(rowset.to_columnar())
+    return dumps(rowset.to_dicts())
+
+def send_json(request: Request, render, headers: dict | None = None, entry=None, variant=None) -> Response:
+    """
+    Raw JSON response for a pre-encoded body, compressed when the client accepts it.
+
+    With ``entry`` the encoded body and each compressed form are memoized on the cache
+    entry under ``variant``, so a hot response is serialized and compressed only once.
+    """
+    headers = dict(headers or {}, Vary="Accept-Encoding")
+    render = timed("render", render)
+    body = entry.variant(variant, render) if entry is not None else render()
 
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), len(body))
+    if encoding:
+        plain = body
+        render_compressed = timed("compress", lambda: compress(plain, encoding))
+        body = entry.variant((variant, encoding), render_compressed) if entry is not None else render_compressed()
+        headers["Content-Encoding"] = encoding
+        if "ETag" in headers:
+            headers["ETag"] = etag_for_encoding(headers["ETag"], encoding)
+
+    # Bodies are pre-encoded, so skip jsonable_encoder/JSONResponse
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def db_error_to_http(table_name: str, e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, PoolTimeoutError):
+        logger.warning("DB pool exhausted: %s", e)
+        return HTTPException(status_code=503, detail="Database busy, please retry.")
+    logger.exception("Query failed")
+    return HTTPException(status_code=500, detail=f"Query failed for table {table_name}: {e}")
+
+# -----------------------------
+# Slow-query EXPLAIN capture
+# -----------------------------
+_explain_tasks = set()
+
+def explain_slow_query(record, query: str, params: tuple, replica: str | None = None):
+    """
+    Attach EXPLAIN FORMAT=JSON to a slow-query record (sync pool, inline; records are rate
+    limited). It runs on the server the query ran on, whose statistics shaped its plan.
+    """
+    try:
+        with pooled_connection(replica=replica) as conn, conn.cursor() as cursor:
+            cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+            slow_query_log.attach_plan(record, cursor.fetchone()[0])
+    except Exception as e:
+        slow_query_log.explain_failed(record, e)
+
+async def explain_slow_query_async(record, query: str, params: tuple, replica: str | None = None):
+    try:
+        async with async_pooled_connection(replica=replica) as conn, conn.cursor() as cursor:
+            await cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+            slow_query_log.attach_plan(record, (await cursor.fetchone())[0])
+    except Exception as e:
+        slow_query_log.explain_failed(record, e)
+
+def is_connection_error(e: Exception) -> bool:
+    """Errors meaning the server could not be reached, as opposed to a failing statement."""
+    if isinstance(e, pymysql.err.OperationalError):
+        # 2xxx are client-side (CR_*) codes: connection refused, server gone away, lost connection
+        return bool(e.args) and isinstance(e.args[0], int) and 2000 <= e.args[0] < 3000
+    return isinstance(e, (pymysql.err.InterfaceError, PoolTimeoutError, OSError, asyncio.TimeoutError))
+
+def query_error(table_name: str, e: Exception, replica: str | None = None) -> Exception:
+    if replica is not None and is_connection_error(e):
+        return ReplicaUnavailable(replica)
+    return db_error_to_http(table_name, e)
+
+def run_query(query: str, params: tuple, table_name: str, replica: str | None = None):
+    """Run a read query on the PyMySQL pool (of ``replica`` if given) and return (cursor description, rows)."""
+    started = time.perf_counter()
+    try:
+        with pooled_connection(replica=replica) as conn, conn.cursor() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            description = cursor.description
+    except Exception as e:
+        raise query_error(table_name, e, replica)
+    elapsed = time.perf_counter() - started
+    observe_query(table_name, elapsed, len(rows))
+    if slow_query_log.is_slow(elapsed):
+        record = slow_query_log.record(table_name, query, params, elapsed, len(rows), replica)
+        if record is not None:
+            explain_slow_query(record, query, params, replica)
+    return description, rows
+
+async def run_query_async(query: str, params: tuple, table_name: str, replica: str | None = None):
+    """Run a read query on the aiomysql pool (of ``replica`` if given) and return (cursor description, rows)."""
+    started = time.perf_counter()
     try:
-        start_date, end_date = get_date_range(months_back)
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = f"""
-            SELECT *
-            FROM {table_name}
-            WHERE {date_column} >= %s AND {date_column} <= %s
+        async with async_pooled_connection(replica=replica) as conn, conn.cursor() as cursor:
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+            description = cursor.description
+    except Exception as e:
+        raise query_error(table_name, e, replica)
+    elapsed = time.perf_counter() - started
+    observe_query(table_name, elapsed, len(rows))
+    if slow_query_log.is_slow(elapsed):
+        record = slow_query_log.record(table_name, query, params, elapsed, len(rows), replica)
+        if record is not None:
+            # The response does not wait for the plan
+            task = asyncio.create_task(explain_slow_query_async(record, query, params, replica))
+            _explain_tasks.add(task)
+            task.add_done_callback(_explain_tasks.discard)
+    return description, rows
+
+async def run_query_on(query: str, params: tuple, table_name: str, replica: str | None = None):
+    """Async driver, or the sync driver in the threadpool when DB_ASYNC=false."""
+    if USE_ASYNC_DB:
+        return await run_query_async(query, params, table_name, replica)
+    return await run_in_threadpool(run_query, query, params, table_name, replica)
+
+# Identical queries in flight at the same time run once; every caller gets the shared result
+query_flight = SingleFlight()
+
+async def execute_query(query: str, params: tuple, table_name: str):
+    """
+    Run a read query on a fresh-enough read replica when configured, else on the primary.
+
+    Inside pinned_reads the server is the pin's, so a cache fill's probe and rows come
+    from the same one.
+
+    Concurrent calls with the same (query, params) are coalesced into one execution, and
+    its result or error is delivered to all of them. Callers must not mutate the rows.
+    """
+    pin = read_pin.get()
+
+    async def run(replica):
+        if replica is not None:
+            try:
+                return await run_query_on(query, params, table_name, replica)
+            except ReplicaUnavailable:
+                replica_router.mark_down(replica)
+                if pin is not None:
+                    pin.fall_back()
+        return await run_query_on(query, params, table_name)
+
+    if pin is None:
+        return await query_flight.do((query, params), lambda: run(replica_router.choose()))
+    replica = pin.choose()
+    return await query_flight.do((query, params, replica), lambda: run(replica))
+
+# The worker's newest heartbeat, compared across servers for lag. retrieved_at only
+# moves when rows change (the worker skips unchanged ones), so a replica that is a
+# second behind would look hours behind right after a change; the heartbeat is
+# written on every run, after the data.
+REPLICATION_POINT_QUERY = "SELECT MAX(checked_at) FROM worker_heartbeat"
+
+async def load_replication_point(replica: str | None = None) -> dict:
+    _, rows = await run_query_on(REPLICATION_POINT_QUERY, (), "replication", replica)
+    return {"worker_heartbeat": rows[0][0]}
+
+replica_router.measure = load_replication_point
+
+def build_version_query(table_name: str, cloud: str | None = None):
+    """Cheap probe for the data version: the latest retrieved_at the worker wrote."""
+    date_column = ALLOWED_TABLES[table_name]["date_column"]
+    query = f"SELECT MAX({date_column}) FROM {table_name}"
+    if cloud:
+        return query + " WHERE cloud = %s", (cloud,)
+    return query, ()
+
+async def load_data_version(table_name: str, cloud: str | None = None):
+    query, params = build_version_query(table_name, cloud)
+    _, rows = await execute_query(query, params, table_name)
+    return rows[0][0] if rows else None
+
+async def cached_entry(key, load, probe):
+    """
+    Go through the response cache, or probe + load directly when CACHE_ENABLED=false.
+
+    The probe and the load of one fill read the same server (core.replicas.ReadPin).
+    """
+    pin = ReadPin(replica_router)
+
+    async def pinned_probe():
+        with pinned_reads(pin):
+            return await probe()
+
+    async def pinned_load():
+        with pinned_reads(pin):
+            return await load()
+
+    if not CACHE_ENABLED:
+        version = await pinned_probe()
+        return CacheEntry(await pinned_load(), version)
+    return await response_cache.get_or_load_entry(key, pinned_load, pinned_probe)
+
+def table_cache_key(table_name, date_column, months_back, cloud, params):
+    # The window start is part of the key so entries roll over at month boundaries
+    return (table_name, cloud, months_back, date_column, params[0])
+
+async def load_table_entry(
+    table_name: str,
+    date_column: str = "retrieved_at",
+    months_back: int = 2,
+    cloud: str | None = None,
+):
+    """RowSet plus the data version it was read at, from the response cache when enabled."""
+    cloud = normalize_cloud(cloud)
+    query, params = build_rows_query(table_name, date_column, months_back, cloud)
+
+    async def load():
+        description, rows = await execute_query(query, params, table_name)
+        return encode_rows(table_name, description, rows)
+
+    async def probe():
+        return await load_data_version(table_name, cloud)
+
+    key = table_cache_key(table_name, date_column, months_back, cloud, params)
+    return await cached_entry(key, load, probe)
+
+def check_validators(request: Request, etag_parts, versions):
+    """
+    Build ETag/Last-Modified from the request identity and data versions.
+
+    Returns (headers, not_modified) where not_modified is a ready 304 response when the
+    client's copy is current, else None.
+    """
+    etag = make_etag(*etag_parts, *versions)
+    modified = [v for v in map(to_utc, versions) if v is not None]
+    last_modified = max(modified) if modified else None
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request.headers, etag, last_modified):
+        # Echo the representation-specific tag (e.g. "...-gzip") the client validated with
+        client_tag = matching_etag(request.headers.get("if-none-match") or "", etag)
+        not_modified_headers = dict(headers, ETag=client_tag or etag, Vary="Accept-Encoding")
+        return headers, Response(status_code=304, headers=not_modified_headers)
+    return headers, None
+
+async def table_response(
+    request: Request,
+    table_name: str,
+    date_column: str = "retrieved_at",
+    months_back: int = 2,
+    cloud: str | None = None,
+    fmt: str = "rows",
+):
+    """
+    Rows as a JSON response carrying ETag/Last-Modified from the data version.
+
+    Conditional requests that still match get a 304 without the rows being serialized,
+    and without touching the DB while the cached version is within its TTL. The encoded
+    body is memoized on the cache entry, so a hot entry is serialized once per format.
+    """
+    cloud = normalize_cloud(cloud)
+    query, params = build_rows_query(table_name, date_column, months_back, cloud)
+    key = table_cache_key(table_name, date_column, months_back, cloud, params)
+
+    if CACHE_ENABLED:
+        entry = response_cache.peek(key) or await load_table_entry(table_name, date_column, months_back, cloud)
+        headers, not_modified = check_validators(request, (*key, fmt), [entry.version])
+        if not_modified:
+            return not_modified
+        return send_json(request, lambda: render_rows(entry.value, fmt), headers, entry, fmt)
+
+    # Uncached: the version and the rows still come from one server
+    with pinned_reads(ReadPin(replica_router)):
+        headers, not_modified = check_validators(request, (*key, fmt), [await load_data_version(table_name, cloud)])
+        if not_modified:
+            return not_modified
+        description, rows = await execute_query(query, params, table_name)
+    return send_json(request, lambda: render_rows(encode_rows(table_name, description, rows), fmt), headers)
+
+async def load_dashboard_entry(cloud: str, months_back: int = 2):
+    """
+    Status and cost RowSets for one cloud as a single cache entry.
+
+    Both row queries run concurrently, each on its own pooled connection; the version is
+    the pair of table versions, so either table changing invalidates the entry.
+    """
+    status_query, status_params = build_rows_query("server_status_agg", months_back=months_back, cloud=cloud)
+    cost_query, cost_params = build_rows_query("cloud_cost_monthly", months_back=months_back, cloud=cloud)
+
+    async def load():
+        (status_desc, status_rows), (cost_desc, cost_rows) = await asyncio.gather(
+            execute_query(status_query, status_params, "server_status_agg"),
+            execute_query(cost_query, cost_params, "cloud_cost_monthly"),
+        )
+        return (
+            encode_rows("server_status_agg", status_desc, status_rows),
+            encode_rows("cloud_cost_monthly", cost_desc, cost_rows),
+        )
+
+    async def probe():
+        return await asyncio.gather(
+            load_data_version("server_status_agg", cloud),
+            load_data_version("cloud_cost_monthly", cloud),
+        )
+
+    return await cached_entry(("dashboard", cloud, months_back, status_params[0]), load, probe)
+
+async def dashboard_response(request: Request, cloud: str, months_back: int = 2, fmt: str = "rows"):
+    """Status and cost rows for one cloud in one payload: {"status": [...], "costs": [...]}."""
+    key = ("dashboard", cloud, months_back, get_date_range(months_back)[0])
+    entry = (response_cache.peek(key) if CACHE_ENABLED else None) or await load_dashboard_entry(cloud, months_back)
+
+    headers, not_modified = check_validators(request, (*key, fmt), list(entry.version))
+    if not_modified:
+        return not_modified
+
+    def render():
+        status, costs = entry.value
+        return b'{"status":' + render_rows(status, fmt) + b',"costs":' + render_rows(costs, fmt) + b"}"
+
+    return send_json(request, render, headers, entry, fmt)
+
+# -----------------------------
+# Cross-cloud summary (aggregated in SQL)
+# -----------------------------
+SUMMARY_COST_QUERY = """
+    SELECT cloud, month_year, SUM(total_amount) AS total_amount
+    FROM cloud_cost_monthly
+    WHERE service <> 'TOTAL' AND retrieved_at >= %s AND retrieved_at <= %s
+    GROUP BY cloud, month_year
+"""
+
+SUMMARY_STATUS_QUERY = """
+    SELECT cloud,
+           SUM(CASE WHEN az = 'ALL' THEN running ELSE 0 END) AS running,
+           SUM(CASE WHEN az = 'ALL' THEN stopped ELSE 0 END) AS stopped,
+           SUM(CASE WHEN az = 'ALL' THEN `terminated` ELSE 0 END) AS `terminated`,
+           SUM(CASE WHEN az = 'TOTAL' THEN 1 ELSE 0 END) AS regions
+    FROM server_status_agg
+    WHERE az IN ('ALL', 'TOTAL') AND retrieved_at >= %s AND retrieved_at <= %s
+    GROUP BY cloud
+"""
+
+STATUS_COUNTERS = ("running", "stopped", "terminated", "regions")
+
+def build_summary(cost_rows, status_rows):
+    """
+    Shape the aggregated rows into a cross-cloud matrix:
+    costs[cloud][month] and status[cloud][counter], plus cross-cloud totals.
+    """
+    clouds = sorted({row[0] for row in cost_rows} | {row[0] for row in status_rows})
+    months = sorted({row[1] for row in cost_rows})
+
+    costs = {cloud: {} for cloud in clouds}
+    cost_totals = {month: 0.0 for month in months}
+    for cloud, month, amount in cost_rows:
+        amount = round(serialize_value(amount), 2)
+        costs[cloud][month] = amount
+        cost_totals[month] = round(cost_totals[month] + amount, 2)
+
+    status = {cloud: dict.fromkeys(STATUS_COUNTERS, 0) for cloud in clouds}
+    status_totals = dict.fromkeys(STATUS_COUNTERS, 0)
+    for cloud, *counts in status_rows:
+        for counter, value in zip(STATUS_COUNTERS, counts):
+            status[cloud][counter] = int(value or 0)
+            status_totals[counter] += int(value or 0)
+
+    return {
+        "clouds": clouds,
+        "months": months,
+        "costs": costs,
+        "cost_totals": cost_totals,
+        "status": status,
+        "status_totals": status_totals,
+    }
+
+async def load_summary_entry(months_back: int = 2):
+    params = get_date_range(months_back)
+
+    async def load():
+        (_, cost_rows), (_, status_rows) = await asyncio.gather(
+            execute_query(SUMMARY_COST_QUERY, params, "cloud_cost_monthly"),
+            execute_query(SUMMARY_STATUS_QUERY, params, "server_status_agg"),
+        )
+        return build_summary(cost_rows, status_rows)
+
+    async def probe():
+        return await asyncio.gather(
+            load_data_version("cloud_cost_monthly"),
+            load_data_version("server_status_agg"),
+        )
+
+    return await cached_entry(("summary", months_back, params[0]), load, probe)
+
+PAGE_SIZE_DEFAULT = 500
+
+async def page_response(
+    request: Request,
+    table_name: str,
+    date_column: str = "retrieved_at",
+    months_back: int = 2,
+    cloud: str | None = None,
+    limit: int = PAGE_SIZE_DEFAULT,
+    cursor: str | None = None,
+    fmt: str = "rows",
+):
+    """
+    One keyset page: {"rows": [...], "next_cursor": str | None}, or with ``fmt`` columnar
+    {"columns": [...], "data": [[...]], "next_cursor": str | None}.
+    """
+    after = decode_page_cursor(table_name, cursor) if cursor else None
+    query, params = build_rows_query(
+        table_name, date_column, months_back, normalize_cloud(cloud), limit=limit + 1, after=after
+    )
+    description, rows = await execute_query(query, params, table_name)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_page_cursor(table_name, [desc[0] for desc in description], rows[-1])
+    rowset = encode_rows(table_name, description, rows)
+    if fmt == "columnar":
+        return send_json(request, lambda: dumps({**rowset.to_columnar(), "next_cursor": next_cursor}))
+    return send_json(request, lambda: dumps({"rows": rowset.to_dicts(), "next_cursor": next_cursor}))
+
+# -----------------------------
+# Status history (append-only, bucketed in SQL)
+# -----------------------------
+HISTORY_TABLE = "server_status_history"
+HISTORY_COUNTERS = ("running", "stopped", "terminated")
+
+# Bucket label per resolution; the bucket start as text sorts and groups like the time
+HISTORY_BUCKETS = {
+    "minute": "%%Y-%%m-%%dT%%H:%%i:00",
+    "hour": "%%Y-%%m-%%dT%%H:00:00",
+    "day": "%%Y-%%m-%%d",
+}
+HISTORY_BUCKET_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+
+def history_retention_days(name: str, default: int) -> int:
+    """The worker's retention setting ``name`` for a history table (0 = forever), at most a year."""
+    days = int(os.environ.get(name, default))
+    return min(days, 366) if days > 0 else 366
+
+# The worker keeps each resolution only for its retention window (app/worker/rollup.py),
+# so the same settings bound the requests: past them the answer would have gaps
+HISTORY_MAX_DAYS = {
+    "minute": min(7, history_retention_days("HISTORY_RAW_RETENTION_DAYS", 14)),
+    "hour": history_retention_days("HISTORY_HOURLY_RETENTION_DAYS", 180),
+    "day": history_retention_days("HISTORY_DAILY_RETENTION_DAYS", 0),
+}
+
+# Rollups the worker compacts raw samples into (app/worker/rollup.py), coarsest first:
+# (table, width of its buckets) holding per-bucket samples and sum/min/max per counter
+HISTORY_ROLLUPS = (
+    ("server_status_daily", "day"),
+    ("server_status_hourly", "hour"),
+)
+
+def history_rollup(bucket: str):
+    """Coarsest rollup whose buckets fit whole into the requested ones, or None for raw samples."""
+    for table, width in HISTORY_ROLLUPS:
+        if HISTORY_BUCKET_SECONDS[bucket] % HISTORY_BUCKET_SECONDS[width] == 0:
+            return table, width
+    return None
+
+def history_window_start(bucket: str, days: int) -> datetime.datetime:
+    # Aligned to the bucket so the first bucket is complete and the cache key only
+    # changes once per bucket; there is no upper bound, new samples bump the version
+    start = datetime.datetime.utcnow().replace(second=0, microsecond=0) - datetime.timedelta(days=days)
+    if bucket == "minute":
+        return start
+    start = start.replace(minute=0)
+    return start.replace(hour=0) if bucket == "day" else start
+
+def history_series(cloud: str, region: str | None = None) -> tuple:
+    return (cloud, region, "TOTAL") if region else (cloud, "ALL", "ALL")
+
+def build_history_watermark_query(table: str, cloud: str, region: str | None = None):
+    """Newest bucket of one series in a rollup table."""
+    query = f"SELECT MAX(bucket_start) FROM {table} WHERE cloud = %s AND region = %s AND az = %s"
+    return query, history_series(cloud, region)
+
+def build_status_history_query(
+    cloud: str, bucket: str, start: datetime.datetime, region: str | None = None, raw_from: datetime.datetime | None = None
+):
+    """
+    Per-bucket sample count and avg/min/max of each counter for one cloud (az 'ALL') or
+    one region (az 'TOTAL') since ``start``.
+
+    Buckets already compacted come from the coarsest fitting rollup; raw samples are
+    only aggregated from ``raw_from``, the end of that rollup's newest bucket for the
+    series (a bound parameter rather than a subquery, so the raw part is a range read
+    of just the current hour or day). Buckets are ordered by the caller: at most a few
+    thousand, not worth a filesort.
+    """
+    series = history_series(cloud, region)
+    where = "cloud = %s AND region = %s AND az = %s"
+    label = HISTORY_BUCKETS[bucket]
+    raw_counters = ", ".join(
+        f"SUM(`{c}`) AS {c}_sum, MIN(`{c}`) AS {c}_min, MAX(`{c}`) AS {c}_max" for c in HISTORY_COUNTERS
+    )
+    raw = f"""
+        SELECT DATE_FORMAT(retrieved_at, '{label}') AS bucket, COUNT(*) AS samples, {raw_counters}
+        FROM {HISTORY_TABLE}
+        WHERE {where} AND retrieved_at >= %s
+    """
+    params = (*series, start)
+
+    rollup = history_rollup(bucket)
+    if rollup is not None:
+        table, width = rollup
+        rolled_counters = ", ".join(f"{c}_sum, {c}_min, {c}_max" for c in HISTORY_COUNTERS)
+        rolled = f"""
+            SELECT DATE_FORMAT(bucket_start, '{label}') AS bucket, samples, {rolled_counters}
+            FROM {table}
+            WHERE {where} AND bucket_start >= %s
         """
-        params = [start_date, end_date]
+        raw = f"{rolled} UNION ALL {raw} GROUP BY bucket"
+        params = (*series, start, *series, max(start, raw_from or start))
+    else:
+        raw += " GROUP BY bucket"
 
-        if cloud_filter:
-            query += " AND UPPER(cloud) = %s"
-            params.append(cloud_filter)
+    # Merged per label, so a bucket spanning the rollup and the raw tail comes out once
+    merged = ", ".join(
+        f"SUM({c}_sum) / SUM(samples) AS {c}_avg, MIN({c}_min) AS {c}_min, MAX({c}_max) AS {c}_max"
+        for c in HISTORY_COUNTERS
+    )
+    query = f"SELECT bucket, CAST(SUM(samples) AS UNSIGNED) AS samples, {merged} FROM ({raw}) AS parts GROUP BY bucket"
+    return query, params
 
-        query += f" ORDER BY {date_column} DESC"
+def build_history_version_query(cloud: str, region: str | None = None):
+    """Newest sample of one series: one index dive per partition."""
+    query = f"SELECT MAX(retrieved_at) FROM {HISTORY_TABLE} WHERE cloud = %s AND region = %s AND az = %s"
+    return query, history_series(cloud, region)
+
+async def load_status_history_entry(cloud: str, bucket: str, days: int, region: str | None = None):
+    start = history_window_start(bucket, days)
+    rollup = history_rollup(bucket)
+
+    async def load():
+        raw_from = None
+        if rollup is not None:
+            table, width = rollup
+            _, rows = await execute_query(*build_history_watermark_query(table, cloud, region), table)
+            if rows and rows[0][0] is not None:
+                raw_from = rows[0][0] + datetime.timedelta(seconds=HISTORY_BUCKET_SECONDS[width])
+        query, params = build_status_history_query(cloud, bucket, start, region, raw_from)
+        description, rows = await execute_query(query, params, HISTORY_TABLE)
+        return encode_rows(HISTORY_TABLE, description, sorted(rows))
+
+    async def probe():
+        _, rows = await execute_query(*build_history_version_query(cloud, region), HISTORY_TABLE)
+        return rows[0][0] if rows else None
+
+    return await cached_entry(("status_history", cloud, region, bucket, days, start), load, probe)
+
+async def status_history_response(
+    request: Request, cloud: str, bucket: str = "hour", days: int = 7, region: str | None = None, fmt: str = "rows"
+):
+    key = ("status_history", cloud, region, bucket, days, history_window_start(bucket, days))
+    entry = (response_cache.peek(key) if CACHE_ENABLED else None) or await load_status_history_entry(cloud, bucket, days, region)
+
+    headers, not_modified = check_validators(request, (*key, fmt), [entry.version])
+    if not_modified:
+        return not_modified
+    return send_json(request, lambda: render_rows(entry.value, fmt), headers, entry, fmt)
+
+# -----------------------------
+# Streaming (server-side cursors)
+# -----------------------------
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", 500))
+
+STREAM_MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+def encode_stream_batch(encoder, batch, fmt: str, first: bool) -> bytes:
+    """One batch of rows as a slice of a JSON array (``first`` omits the leading comma) or as NDJSON lines."""
+    rows = encoder.encode(batch).to_dicts()
+    if fmt == "ndjson":
+        return b"".join(dumps(row) + b"\n" for row in rows)
+    return (b"" if first else b",") + dumps(rows)[1:-1]
+
+def stream_rows_sync(table_name: str, query: str, params: tuple, fmt: str, replica: str | None = None):
+    """
+    Yield encoded chunks from an unbuffered SSCursor, STREAM_BATCH_SIZE rows at a time.
+
+    The first chunk is produced right after the query executes. If the consumer stops
+    early the connection is discarded rather than drained back into the pool.
+    """
+    with pooled_connection(replica=replica) as conn:
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(query, params)
+        encoder = get_row_encoder(table_name, cursor.description)
+        yield b"[" if fmt == "json" else b""
+
+        first = True
+        while batch := cursor.fetchmany(STREAM_BATCH_SIZE):
+            yield encode_stream_batch(encoder, batch, fmt, first)
+            first = False
 
-        cursor.execute(query, tuple(params))
-        rows = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
         cursor.close()
-        conn.close()
-
-        return [
-            {columns[i]: serialize_value(row[i]) for i in range(len(columns))}
-            for row in rows
-        ]
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception("Query failed")
-        raise HTTPException(status_code=500, detail=f"Query failed for table {table_name}: {e}")
+        if fmt == "json":
+            yield b"]"
+
+async def stream_rows_async(table_name: str, query: str, params: tuple, fmt: str, replica: str | None = None):
+    """Async twin of stream_rows_sync on an aiomysql SSCursor."""
+    async with async_pooled_connection(replica=replica) as conn:
+        cursor = await conn.cursor(aiomysql.SSCursor)
+        await cursor.execute(query, params)
+        encoder = get_row_encoder(table_name, cursor.description)
+        yield b"[" if fmt == "json" else b""
+
+        first = True
+        while batch := await cursor.fetchmany(STREAM_BATCH_SIZE):
+            yield encode_stream_batch(encoder, batch, fmt, first)
+            first = False
+
+        await cursor.close()
+        if fmt == "json":
+            yield b"]"
+
+async def stream_response(
+    table_name: str,
+    date_column: str = "retrieved_at",
+    months_back: int = 2,
+    cloud: str | None = None,
+    fmt: str = "json",
+):
+    """
+    Stream rows with memory bounded by STREAM_BATCH_SIZE instead of the result size.
+
+    The query runs before the response starts, so DB errors still map to HTTP errors;
+    failures mid-stream can only truncate the body and are logged.
+    """
+    query, params = build_rows_query(table_name, date_column, months_back, normalize_cloud(cloud))
+
+    async def start(replica):
+        if USE_ASYNC_DB:
+            chunks = stream_rows_async(table_name, query, params, fmt, replica)
+            next_chunk = chunks.__anext__
+        else:
+            sync_chunks = stream_rows_sync(table_name, query, params, fmt, replica)
+            chunks = iterate_in_threadpool(sync_chunks)
+            next_chunk = lambda: run_in_threadpool(next, sync_chunks)
+        try:
+            return chunks, await next_chunk()
+        except Exception as e:
+            raise query_error(table_name, e, replica)
+
+    replica = replica_router.choose()
+    try:
+        chunks, head = await start(replica)
+    except ReplicaUnavailable:
+        replica_router.mark_down(replica)
+        chunks, head = await start(None)
+
+    async def body():
+        yield head
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception:
+            logger.exception("Streaming query failed for table %s", table_name)
+            raise
+
+    return StreamingResponse(body(), media_type=STREAM_MEDIA_TYPES[fmt])
+
+# -----------------------------
+# Server-Sent Events
+# -----------------------------
+SSE_KEEPALIVE_SECONDS = float(os.environ.get("SSE_KEEPALIVE_SECONDS", 15))
+SSE_RETRY_MS = int(os.environ.get("SSE_RETRY_MS", 5000))
+
+async def load_cloud_versions(cloud: str) -> dict:
+    versions = await asyncio.gather(*(load_data_version(table, cloud) for table in sorted(ALLOWED_TABLES)))
+    return dict(zip(sorted(ALLOWED_TABLES), versions))
+
+def expire_cloud_entries(cloud: str, changed, publish: bool = True):
+    # Cached results for this cloud (and cross-cloud ones) would otherwise stay fresh
+    # for up to CACHE_TTL_SECONDS, and clients refetching on the event would get old data
+    expired = response_cache.expire(lambda key: key[0] == "summary" or key[1] in (cloud, None))
+    logger.info("%s data changed (%s); expired %d cache entries", cloud, ", ".join(changed), expired)
+    if publish and response_cache.shared is not None:
+        # Other worker processes expire theirs too, whether or not they have a subscriber
+        message = {"cloud": cloud, "changed": list(changed), "origin": os.getpid()}
+        task = asyncio.create_task(publish_invalidation(message))
+        _invalidation_tasks.add(task)
+        task.add_done_callback(_invalidation_tasks.discard)
+
+_invalidation_tasks = set()
+
+async def publish_invalidation(message: dict):
+    try:
+        await response_cache.shared.publish(CACHE_INVALIDATION_CHANNEL, message)
+    except Exception:
+        logger.warning("Publishing cache invalidation for %s failed", message["cloud"], exc_info=True)
+
+def on_cache_invalidation(message: dict):
+    if message.get("origin") != os.getpid():
+        expire_cloud_entries(message["cloud"], message["changed"], publish=False)
+
+def sse_message(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+async def cloud_update_events(request: Request, cloud: str):
+    """
+    One "update" event per worker write for ``cloud``: {"cloud", "changed": [tables], "version"}.
+
+    Subscribers share a single version poll per cloud (core.events.change_feed), so the
+    probe load does not grow with the number of open dashboards.
+    """
+    queue = change_feed.subscribe(cloud, lambda: load_cloud_versions(cloud), expire_cloud_entries)
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield b": keepalive\n\n"
+                continue
+            yield sse_message("update", {"cloud": cloud, "changed": event["changed"], "version": event["version"]})
+    finally:
+        change_feed.unsubscribe(cloud, queue)
 
 # -----------------------------
 # Explicit Cloud Endpoints Only
@@ -113,39 +924,141 @@ def fetch_table_rows_by_date(
 
 # AWS
 @app.get("/api/aws/costs")
-def get_aws_costs(months_back: int = Query(2, ge=0, le=12)):
-    return fetch_table_rows_by_date("cloud_cost_monthly", months_back=months_back, cloud="AWS")
+async def get_aws_costs(request: Request, months_back: int = Query(2, ge=0, le=12), fmt: RowFormat = "rows"):
+    return await table_response(request, "cloud_cost_monthly", months_back=months_back, cloud="AWS", fmt=fmt)
 
 @app.get("/api/aws/status")
-def get_aws_status(months_back: int = Query(2, ge=0, le=12)):
-    return fetch_table_rows_by_date("server_status_agg", months_back=months_back, cloud="AWS")
+async def get_aws_status(request: Request, months_back: int = Query(2, ge=0, le=12), fmt: RowFormat = "rows"):
+    return await table_response(request, "server_status_agg", months_back=months_back, cloud="AWS", fmt=fmt)
+
+@app.get("/api/aws/dashboard")
+async def get_aws_dashboard(request: Request, months_back: int = Query(2, ge=0, le=12), fmt: RowFormat = "rows"):
+    return await dashboard_response(request, "AWS", months_back=months_back, fmt=fmt)
 
 # Azure
 @app.get("/api/azure/costs")
-def get_azure_costs(months_back: int = Query(2, ge=0, le=12)):
-    return fetch_table_rows_by_date("cloud_cost_monthly", months_back=months_back, cloud="AZURE")
+async def get_azure_costs(request: Request, months_back: int = Query(2, ge=0, le=12), fmt: RowFormat = "rows"):
+    return await table_response(request, "cloud_cost_monthly", months_back=months_back, cloud="AZURE", fmt=fmt)
 
 @app.get("/api/azure/status")
-def get_azure_status(months_back: int = Query(2, ge=0, le=12)):
-    return fetch_table_rows_by_date("server_status_agg", months_back=months_back, cloud="AZURE")
+async def get_azure_status(request: Request, months_back: int = Query(2, ge=0, le=12), fmt: RowFormat = "rows"):
+    return await table_response(request, "server_status_agg", months_back=months_back, cloud="AZURE", fmt=fmt)
+
+@app.get("/api/azure/dashboard")
+async def get_azure_dashboard(request: Request, months_back: int = Query(2, ge=0, le=12), fmt: RowFormat = "rows"):
+    return await dashboard_response(request, "AZURE", months_back=months_back, fmt=fmt)
 
 # GCP
 @app.get("/api/gcp/costs")
-def get_gcp_costs(months_back: int = Query(2, ge=0, le=12)):
-    return fetch_table_rows_by_date("cloud_cost_monthly", months_back=months_back, cloud="GCP")
+async def get_gcp_costs(request: Request, months_back: int = Query(2, ge=0, le=12), fmt: RowFormat = "rows"):
+    return await table_response(request, "cloud_cost_monthly", months_back=months_back, cloud="GCP", fmt=fmt)
 
 @app.get("/api/gcp/status")
-def get_gcp_status(months_back: int = Query(2, ge=0, le=12)):
-    return fetch_table_rows_by_date("server_status_agg", months_back=months_back, cloud="GCP")
+async def get_gcp_status(request: Request, months_back: int = Query(2, ge=0, le=12), fmt: RowFormat = "rows"):
+    return await table_response(request, "server_status_agg", months_back=months_back, cloud="GCP", fmt=fmt)
+
+@app.get("/api/gcp/dashboard")
+async def get_gcp_dashboard(request: Request, months_back: int = Query(2, ge=0, le=12), fmt: RowFormat = "rows"):
+    return await dashboard_response(request, "GCP", months_back=months_back, fmt=fmt)
+
+# Cross-cloud
+@app.get("/api/summary")
+async def get_summary(request: Request, months_back: int = Query(2, ge=0, le=12)):
+    entry = await load_summary_entry(months_back)
+    # The window start moves at month boundaries while the version probe is unfiltered
+    etag_parts = ("summary", months_back, get_date_range(months_back)[0])
+    headers, not_modified = check_validators(request, etag_parts, list(entry.version))
+    if not_modified:
+        return not_modified
+    return send_json(request, lambda: dumps(entry.value), headers, entry, "json")
+
+# Status over time
+@app.get("/api/{cloud}/status/history")
+async def get_status_history(
+    request: Request,
+    cloud: str,
+    bucket: str = Query("hour", pattern="^(minute|hour|day)$"),
+    days: int = Query(7, ge=1, le=366),
+    region: str | None = Query(None, max_length=32),
+    fmt: RowFormat = "rows",
+):
+    if days > HISTORY_MAX_DAYS[bucket]:
+        raise HTTPException(status_code=400, detail=f"At most {HISTORY_MAX_DAYS[bucket]} days of {bucket} buckets.")
+    return await status_history_response(request, normalize_cloud(cloud), bucket, days, region, fmt)
+
+# Live updates
+@app.get("/api/stream/{cloud}")
+async def stream_cloud_updates(request: Request, cloud: str):
+    cloud = normalize_cloud(cloud)
+    return StreamingResponse(
+        cloud_update_events(request, cloud),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # -----------------------------
 # Admin Endpoint (optional)
 # -----------------------------
 @app.get("/api/table/{table_name}")
-def get_custom_table(
+async def get_custom_table(
+    request: Request,
     table_name: str,
     months_back: int = Query(2, ge=0, le=12),
     date_column: str = Query("retrieved_at"),
     cloud: str | None = Query(None),
+    stream: str | None = Query(None, pattern="^(json|ndjson)$"),
+    limit: int | None = Query(None, ge=1, le=5000),
+    cursor: str | None = Query(None),
+    fmt: RowFormat = "rows",
 ):
-    return fetch_table_rows_by_date(table_name, date_column=date_column, months_back=months_back, cloud=cloud)
+    if limit is not None or cursor:
+        return await page_response(
+            request, table_name, date_column=date_column, months_back=months_back, cloud=cloud,
+            limit=limit or PAGE_SIZE_DEFAULT, cursor=cursor, fmt=fmt,
+        )
+    if stream:
+        if fmt != "rows":
+            raise HTTPException(status_code=400, detail="format=columnar cannot be streamed; use limit/cursor pages.")
+        return await stream_response(table_name, date_column=date_column, months_back=months_back, cloud=cloud, fmt=stream)
+    return await table_response(request, table_name, date_column=date_column, months_back=months_back, cloud=cloud, fmt=fmt)
+
+@app.get("/api/admin/pool")
+def get_pool_stats():
+    if USE_ASYNC_DB:
+        return {"driver": "async", **async_pool_stats(), "replicas": async_replica_pool_stats()}
+    return {"driver": "sync", **get_pool().stats(), "replicas": replica_pool_stats()}
+
+@app.get("/api/admin/replicas")
+def get_replica_stats():
+    return {**replica_router.stats(), "replicas": replica_router.replicas()}
+
+@app.get("/api/admin/cache")
+def get_cache_stats():
+    return {"enabled": CACHE_ENABLED, **response_cache.stats()}
+
+@app.get("/api/admin/slow-queries")
+def get_slow_queries(table: str | None = Query(None), limit: int = Query(50, ge=1, le=500)):
+    return {**slow_query_log.stats(), "records": slow_query_log.records(table, limit)}
+
+@app.get("/api/admin/stream")
+def get_stream_stats():
+    return change_feed.stats()
+
+# -----------------------------
+# Prometheus
+# -----------------------------
+def db_pool_stats():
+    # Read the pool that serves requests without creating the other one
+    return async_pool_stats() if USE_ASYNC_DB else get_pool().stats()
+
+register_stats("db_pool", db_pool_stats, ("min_size", "max_size", "size", "idle", "in_use"))
+register_stats("response_cache", response_cache.stats, ("entries", "max_entries", "ttl", "stale_ttl", "refreshing"))
+register_stats("change_feed", change_feed.stats, ("interval",))
+register_stats("replica_router", replica_router.stats, ("max_lag", "check_interval", "healthy"))
+register_stats("query_flight", query_flight.stats, ("in_flight",))
+register_stats("slow_queries", slow_query_log.stats, ("threshold_ms", "sample_rate", "max_per_minute", "size"))
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,59 @@
+"""
+EXPLAIN-based check for the queries behind the cloud endpoints.
+
+Runs ``EXPLAIN FORMAT=JSON`` for the row query and the version probe of every
+(table, cloud) pair, and for the status history queries over a year, and fails if any plan reads a table with a full scan
+(access_type ALL or a full index scan) or needs a filesort.
+
+Run it from app/backend against a database holding representative volumes —
+on near-empty tables the optimizer legitimately prefers a full scan:
+
+    python -m bench.check_query_plans
+"""
+import json
+import sys
+
+from api.metrics import (
+    ALLOWED_CLOUDS, ALLOWED_TABLES, HISTORY_BUCKETS, HISTORY_MAX_DAYS, HISTORY_ROLLUPS, build_history_version_query,
+    build_history_watermark_query, build_rows_query, build_status_history_query, build_version_query,
+    history_window_start,
+)
+from core.database import get_db_connection
+from core.slow_queries import plan_problems
+
+
+def dashboard_queries():
+    for table_name in sorted(ALLOWED_TABLES):
+        for cloud in sorted(ALLOWED_CLOUDS):
+            yield f"{table_name} rows [{cloud}]", build_rows_query(table_name, months_back=2, cloud=cloud)
+            yield f"{table_name} version [{cloud}]", build_version_query(table_name, cloud)
+    for cloud in sorted(ALLOWED_CLOUDS):
+        for bucket in HISTORY_BUCKETS:
+            start = history_window_start(bucket, HISTORY_MAX_DAYS[bucket])
+            yield f"status history by {bucket} [{cloud}]", build_status_history_query(cloud, bucket, start)
+        yield f"status history version [{cloud}]", build_history_version_query(cloud)
+        for table, _ in HISTORY_ROLLUPS:
+            yield f"{table} watermark [{cloud}]", build_history_watermark_query(table, cloud)
+
+
+def main():
+    conn = get_db_connection()
+    failures = 0
+    try:
+        with conn.cursor() as cursor:
+            for label, (query, params) in dashboard_queries():
+                cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+                problems = plan_problems(json.loads(cursor.fetchone()[0]))
+                status = "FAIL" if problems else "ok"
+                print(f"{status:4} {label}" + (f": {', '.join(problems)}" if problems else ""))
+                failures += bool(problems)
+    finally:
+        conn.close()
+
+    if failures:
+        print(f"\n{failures} query plan(s) use a full scan or filesort.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Load test for every endpoint in api/metrics.py at a fixed concurrency.
+
+Starts the API with uvicorn (or targets --base-url), warms each endpoint up, then keeps
+--concurrency requests in flight for --duration seconds per endpoint and reports RPS,
+p50/p95/p99 latency, errors and the server's RSS. Results are written as JSON so runs
+can be compared across commits:
+
+    cd app/backend
+    python -m bench.seed --reset                # once, against a scratch database
+    python -m bench.load_test --concurrency 32 --duration 10
+    python -m bench.load_test compare bench/results/<old>.json bench/results/<new>.json
+
+The server inherits the environment (DB_*, DB_ASYNC, CACHE_ENABLED, ...), so the same
+command benchmarks each configuration. /api/stream/{cloud} is long-lived and skipped.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# (name, path) pairs; every GET route of the API should appear here at least once
+ENDPOINTS = [
+    ("aws_costs", "/api/aws/costs"),
+    ("aws_status", "/api/aws/status"),
+    ("aws_dashboard", "/api/aws/dashboard"),
+    ("azure_costs", "/api/azure/costs"),
+    ("azure_status", "/api/azure/status"),
+    ("azure_dashboard", "/api/azure/dashboard"),
+    ("gcp_costs", "/api/gcp/costs"),
+    ("gcp_status", "/api/gcp/status"),
+    ("gcp_dashboard", "/api/gcp/dashboard"),
+    ("aws_status_history_hourly", "/api/aws/status/history?bucket=hour&days=7"),
+    ("aws_status_history_daily", "/api/aws/status/history?bucket=day&days=366"),
+    ("aws_costs_columnar", "/api/aws/costs?format=columnar"),
+    ("aws_costs_12_months", "/api/aws/costs?months_back=12"),
+    ("summary", "/api/summary"),
+    ("table", "/api/table/cloud_cost_monthly?months_back=12"),
+    ("table_page", "/api/table/cloud_cost_monthly?months_back=12&limit=500"),
+    ("table_stream_ndjson", "/api/table/cloud_cost_monthly?months_back=12&stream=ndjson"),
+    ("table_stream_json", "/api/table/server_status_agg?stream=json"),
+    ("admin_pool", "/api/admin/pool"),
+    ("admin_cache", "/api/admin/cache"),
+    ("admin_replicas", "/api/admin/replicas"),
+    ("admin_slow_queries", "/api/admin/slow-queries"),
+    ("admin_stream", "/api/admin/stream"),
+    ("metrics", "/metrics"),
+]
+SKIPPED_ROUTES = {"/api/stream/{cloud}"}
+
+
+def uncovered_routes():
+    """API routes with no entry in ENDPOINTS, so the suite cannot silently fall behind the API."""
+    from api.metrics import app
+
+    covered = {path.split("?")[0] for _, path in ENDPOINTS}
+    missing = []
+    for route in app.routes:
+        path = getattr(route, "path", "")
+        if not path.startswith(("/api/", "/metrics")) or path in SKIPPED_ROUTES:
+            continue
+        if path.replace("{table_name}", "cloud_cost_monthly").replace("{cloud}", "aws") not in covered:
+            missing.append(path)
+    return missing
+
+
+# -----------------------------
+# Server
+# -----------------------------
+def rss_mb(pid):
+    """Current and peak resident set size of ``pid`` in MiB (Linux /proc), or None elsewhere."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None, None
+    values = {}
+    for line in status.splitlines():
+        key, _, value = line.partition(":")
+        if key in ("VmRSS", "VmHWM"):
+            values[key] = round(int(value.split()[0]) / 1024, 1)
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def start_server(port):
+    backend = Path(__file__).resolve().parent.parent
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.metrics:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {proc.returncode}")
+        try:
+            httpx.get(base_url + "/api/admin/pool", timeout=1)
+            return proc, base_url
+        except httpx.TransportError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("uvicorn did not start within 30s")
+
+
+# -----------------------------
+# Load
+# -----------------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def drive(client, path, concurrency, duration):
+    latencies, errors, response_bytes = [], 0, 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors, response_bytes
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                body = response.content
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            response_bytes += len(body)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda v: None if v is None else round(v * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "mean_bytes": round(response_bytes / len(latencies)) if latencies else 0,
+    }
+
+
+async def run_suite(base_url, endpoints, args, pid):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"Accept-Encoding": args.accept_encoding}
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, headers=headers, timeout=args.timeout) as client:
+        for name, path in endpoints:
+            for _ in range(args.warmup):
+                try:
+                    await client.get(path)
+                except httpx.HTTPError:
+                    pass  # counted as errors in the measured run
+            result = await drive(client, path, args.concurrency, args.duration)
+            result["rss_mb"], _ = rss_mb(pid) if pid else (None, None)
+            results[name] = result
+            print(f"{name:22} {result['rps']:9.1f} rps  p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  "
+                  f"p99 {result['p99_ms']} ms  errors {result['errors']}")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    missing = uncovered_routes()
+    if missing:
+        print(f"warning: no load profile for {', '.join(missing)}", file=sys.stderr)
+
+    endpoints = [(n, p) for n, p in ENDPOINTS if not args.only or n in args.only]
+    proc, pid = None, None
+    base_url = args.base_url
+    if base_url is None:
+        proc, base_url = start_server(args.port)
+        pid = proc.pid
+    try:
+        rss_start, _ = rss_mb(pid) if pid else (None, None)
+        results = asyncio.run(run_suite(base_url, endpoints, args, pid))
+        rss_end, rss_peak = rss_mb(pid) if pid else (None, None)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "accept_encoding": args.accept_encoding,
+            "env": {k: v for k, v in os.environ.items() if k.startswith(("DB_ASYNC", "DB_POOL_", "CACHE_", "COMPRESSION_"))},
+        },
+        "rss_mb": {"start": rss_start, "end": rss_end, "peak": rss_peak},
+        "endpoints": results,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{report['meta']['timestamp'].replace(':', '')}-{report['meta']['revision'] or 'local'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nRSS start {rss_start} MiB, end {rss_end} MiB, peak {rss_peak} MiB\nresults: {out}")
+
+
+def compare(args):
+    """Side-by-side RPS and p95/p99 of two result files; changes are relative to the first."""
+    old, new = (json.loads(Path(p).read_text()) for p in (args.old, args.new))
+    print(f"{'endpoint':22} {'rps':>21} {'p95 ms':>23} {'p99 ms':>23}")
+    for name, after in new["endpoints"].items():
+        before = old["endpoints"].get(name)
+        if before is None:
+            continue
+        cells = []
+        for key in ("rps", "p95_ms", "p99_ms"):
+            a, b = before[key], after[key]
+            change = f"{(b - a) / a * 100:+.0f}%" if a and b is not None else "n/a"
+            cells.append(f"{a!s:>8} -> {b!s:>8} {change:>5}")
+        print(f"{name:22} " + " ".join(cells))
+    print(f"RSS peak: {old['rss_mb']['peak']} -> {new['rss_mb']['peak']} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command")
+
+    cmp_parser = sub.add_parser("compare", help="compare two result files")
+    cmp_parser.add_argument("old")
+    cmp_parser.add_argument("new")
+
+    parser.add_argument("--base-url", help="target a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="requests per endpoint before measuring")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--accept-encoding", default="identity")
+    parser.add_argument("--only", nargs="*", help="endpoint names to run (default: all)")
+    parser.add_argument("--out", help="result file (default: bench/results/<timestamp>-<revision>.json)")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        compare(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Seed cloud_cost_monthly and server_status_agg with synthetic rows for benchmarking.
+
+Creates the tables with the worker's schema if they are missing, optionally empties
+them, then bulk-inserts a deterministic data set (same --seed, same rows):
+
+- cloud_cost_monthly: clouds x months x (services + TOTAL)
+- server_status_agg:  clouds x regions x (azs + TOTAL), plus one ALL/ALL row per cloud
+- server_status_history: the region TOTAL and ALL/ALL series every --history-interval
+  minutes over the last --history-days days (what the worker appends on each run)
+- server_status_hourly / server_status_daily: those samples rolled up to complete hours
+  and days, as the worker's compaction job would have left them
+
+``retrieved_at`` is spread over the seeded months so the endpoints' date windows
+select a realistic fraction of the table. Point DB_HOST/DB_NAME/DB_USER/DB_PASS at a
+scratch database, e.g. ``docker run -e MYSQL_ROOT_PASSWORD=bench -e MYSQL_DATABASE=bench
+-p 3306:3306 mysql:8.0``, then from app/backend:
+
+    python -m bench.seed --months 24 --services 400 --regions 30 --azs 6 --reset
+"""
+import argparse
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from core.database import get_db_connection
+
+CLOUDS = ("AWS", "AZURE", "GCP")
+
+# Same DDL as the worker's ensure_tables, so plans match production
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS cloud_cost_monthly (
+        cloud VARCHAR(32) NOT NULL,
+        month_year VARCHAR(7) NOT NULL,
+        service VARCHAR(128) NOT NULL,
+        total_amount DECIMAL(18,2) NOT NULL,
+        pct_of_total DECIMAL(5,2) NOT NULL,
+        retrieved_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (cloud, month_year, service),
+        INDEX idx_cost_cloud_retrieved (cloud, retrieved_at, total_amount, pct_of_total),
+        INDEX idx_cost_retrieved (retrieved_at)
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS server_status_agg (
+        cloud VARCHAR(32) NOT NULL,
+        region VARCHAR(32) NOT NULL,
+        az VARCHAR(32) NOT NULL,
+        running INT NOT NULL,
+        stopped INT NOT NULL,
+        `terminated` INT NOT NULL,
+        retrieved_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (cloud, region, az),
+        INDEX idx_status_cloud_retrieved (cloud, retrieved_at, running, stopped, `terminated`),
+        INDEX idx_status_retrieved (retrieved_at)
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS worker_heartbeat (
+        cloud VARCHAR(32) NOT NULL,
+        step VARCHAR(32) NOT NULL,
+        checked_at DATETIME NOT NULL,
+        PRIMARY KEY (cloud, step)
+    ) ENGINE=InnoDB
+    """,
+)
+
+# The worker's history DDL, with its monthly partitions laid out up front
+STATUS_HISTORY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS server_status_history (
+        cloud VARCHAR(32) NOT NULL,
+        region VARCHAR(32) NOT NULL,
+        az VARCHAR(32) NOT NULL,
+        running INT NOT NULL,
+        stopped INT NOT NULL,
+        `terminated` INT NOT NULL,
+        retrieved_at DATETIME NOT NULL,
+        PRIMARY KEY (cloud, region, az, retrieved_at),
+        INDEX idx_history_retrieved (retrieved_at)
+    ) ENGINE=InnoDB
+    PARTITION BY RANGE COLUMNS (retrieved_at) ({partitions})
+"""
+
+ROLLUP_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        cloud VARCHAR(32) NOT NULL,
+        region VARCHAR(32) NOT NULL,
+        az VARCHAR(32) NOT NULL,
+        bucket_start DATETIME NOT NULL,
+        samples INT NOT NULL,
+        running_sum BIGINT NOT NULL,
+        running_min INT NOT NULL,
+        running_max INT NOT NULL,
+        stopped_sum BIGINT NOT NULL,
+        stopped_min INT NOT NULL,
+        stopped_max INT NOT NULL,
+        terminated_sum BIGINT NOT NULL,
+        terminated_min INT NOT NULL,
+        terminated_max INT NOT NULL,
+        PRIMARY KEY (cloud, region, az, bucket_start),
+        INDEX idx_bucket_start (bucket_start)
+    ) ENGINE=InnoDB
+"""
+ROLLUPS = {
+    "server_status_hourly": "TIMESTAMP(DATE(retrieved_at), MAKETIME(HOUR(retrieved_at), 0, 0))",
+    "server_status_daily": "TIMESTAMP(DATE(retrieved_at))",
+}
+ROLLUP_INSERT = """
+    INSERT INTO {table}
+    SELECT cloud, region, az, {bucket_start} AS bucket_start, COUNT(*),
+           SUM(running), MIN(running), MAX(running),
+           SUM(stopped), MIN(stopped), MAX(stopped),
+           SUM(`terminated`), MIN(`terminated`), MAX(`terminated`)
+    FROM server_status_history
+    WHERE retrieved_at < %s
+    GROUP BY cloud, region, az, bucket_start
+"""
+
+COST_INSERT = """
+    INSERT INTO cloud_cost_monthly (cloud, month_year, service, total_amount, pct_of_total, retrieved_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+STATUS_INSERT = """
+    INSERT INTO server_status_agg (cloud, region, az, running, stopped, `terminated`, retrieved_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+HEARTBEAT_INSERT = """
+    INSERT INTO worker_heartbeat (cloud, step, checked_at) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE checked_at=VALUES(checked_at)
+"""
+STATUS_HISTORY_INSERT = """
+    INSERT INTO server_status_history (cloud, region, az, running, stopped, `terminated`, retrieved_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def month_starts(count, now):
+    """First day of the current month and of the ``count - 1`` months before it, newest first."""
+    year, month = now.year, now.month
+    for _ in range(count):
+        yield datetime.datetime(year, month, 1)
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+
+
+def cost_rows(rng, months, services, now):
+    for month_start in month_starts(months, now):
+        # Rows for a past month were last refreshed at its end, the current month's just now
+        next_month = (month_start + datetime.timedelta(days=32)).replace(day=1)
+        retrieved_at = min(now, next_month - datetime.timedelta(hours=1))
+        for cloud in CLOUDS:
+            amounts = [Decimal(f"{rng.lognormvariate(3, 1.5):.2f}") for _ in range(services)]
+            total = sum(amounts) or Decimal("1")
+            for i, amount in enumerate(amounts):
+                pct = (amount * 100 / total).quantize(Decimal("0.01"))
+                yield (cloud, month_start.strftime("%Y-%m"), f"service-{i:04d}", amount, pct, retrieved_at)
+            yield (cloud, month_start.strftime("%Y-%m"), "TOTAL", total, Decimal("100.00"), retrieved_at)
+
+
+def status_rows(rng, regions, azs, now):
+    for cloud in CLOUDS:
+        grand = [0, 0, 0]
+        for r in range(regions):
+            region = f"{cloud.lower()}-region-{r:02d}"
+            region_total = [0, 0, 0]
+            for a in range(azs):
+                counts = [rng.randint(0, 200), rng.randint(0, 50), rng.randint(0, 20)]
+                region_total = [x + y for x, y in zip(region_total, counts)]
+                yield (cloud, region, f"{region}{chr(ord('a') + a)}", *counts, now)
+            grand = [x + y for x, y in zip(grand, region_total)]
+            yield (cloud, region, "TOTAL", *region_total, now)
+        yield (cloud, "ALL", "ALL", *grand, now)
+
+
+def history_partitions(days, now):
+    """One partition per month from the oldest seeded sample to two months ahead, then pmax."""
+    oldest = now - datetime.timedelta(days=days)
+    months = (now.year - oldest.year) * 12 + now.month - oldest.month
+    starts = sorted(month_starts(months + 1, now))
+    last = starts[-1]
+    for _ in range(2):
+        last = (last + datetime.timedelta(days=32)).replace(day=1)
+        starts.append(last)
+    parts = [
+        f"PARTITION p{start:%Y%m} VALUES LESS THAN ('{(start + datetime.timedelta(days=32)).replace(day=1):%Y-%m-%d}')"
+        for start in starts
+    ]
+    return ", ".join(parts + ["PARTITION pmax VALUES LESS THAN (MAXVALUE)"])
+
+
+def status_history_rows(rng, regions, days, interval, now):
+    samples = days * 24 * 60 // interval
+    for cloud in CLOUDS:
+        # Slowly drifting fleet sizes, so the buckets have something to aggregate
+        base = [[rng.randint(50, 1000), rng.randint(5, 200), rng.randint(0, 40)] for _ in range(regions)]
+        for i in range(samples, 0, -1):
+            retrieved_at = now - datetime.timedelta(minutes=i * interval)
+            grand = [0, 0, 0]
+            for r, counts in enumerate(base):
+                counts = [max(0, c + rng.randint(-3, 3)) for c in counts]
+                base[r] = counts
+                grand = [x + y for x, y in zip(grand, counts)]
+                yield (cloud, f"{cloud.lower()}-region-{r:02d}", "TOTAL", *counts, retrieved_at)
+            yield (cloud, "ALL", "ALL", *grand, retrieved_at)
+
+
+def insert_batches(cursor, statement, rows, batch_size):
+    count, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            cursor.executemany(statement, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(statement, batch)
+        count += len(batch)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=24, help="months of cost history per cloud")
+    parser.add_argument("--services", type=int, default=400, help="services per cloud and month")
+    parser.add_argument("--regions", type=int, default=30, help="regions per cloud")
+    parser.add_argument("--azs", type=int, default=6, help="availability zones per region")
+    parser.add_argument("--history-days", type=int, default=30, help="days of status history per cloud")
+    parser.add_argument("--history-interval", type=int, default=5, help="minutes between status history samples")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--reset", action="store_true", help="empty both tables first")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            if args.reset:
+                # Recreated so its partitions cover the seeded window
+                cursor.execute("DROP TABLE IF EXISTS server_status_history")
+                for table in ROLLUPS:
+                    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            for ddl in SCHEMA:
+                cursor.execute(ddl)
+            cursor.execute(STATUS_HISTORY_SCHEMA.format(partitions=history_partitions(args.history_days, now)))
+            for table in ROLLUPS:
+                cursor.execute(ROLLUP_SCHEMA.format(table=table))
+            if args.reset:
+                cursor.execute("TRUNCATE TABLE cloud_cost_monthly")
+                cursor.execute("TRUNCATE TABLE server_status_agg")
+
+            started = time.perf_counter()
+            costs = insert_batches(cursor, COST_INSERT, cost_rows(rng, args.months, args.services, now), args.batch_size)
+            statuses = insert_batches(cursor, STATUS_INSERT, status_rows(rng, args.regions, args.azs, now), args.batch_size)
+            history = insert_batches(
+                cursor, STATUS_HISTORY_INSERT,
+                status_history_rows(rng, args.regions, args.history_days, args.history_interval, now), args.batch_size,
+            )
+            cursor.executemany(HEARTBEAT_INSERT, [(cloud, step, now) for cloud in CLOUDS for step in ("cost", "status")])
+            # Complete hours and days only; the current ones are aggregated from raw samples
+            this_hour = now.replace(minute=0, second=0)
+            for table, bucket_start in ROLLUPS.items():
+                end = this_hour.replace(hour=0) if table == "server_status_daily" else this_hour
+                cursor.execute(ROLLUP_INSERT.format(table=table, bucket_start=bucket_start), (end,))
+            cursor.execute(
+                "ANALYZE TABLE cloud_cost_monthly, server_status_agg, server_status_history, "
+                + ", ".join(ROLLUPS)
+            )
+            cursor.fetchall()
+    finally:
+        conn.close()
+
+    print(f"cloud_cost_monthly: {costs:,} rows, server_status_agg: {statuses:,} rows, "
+          f"server_status_history: {history:,} rows in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: cost of turning 10k cloud_cost_monthly rows into a JSON body.
+
+"before" replays the original path: a dict comprehension calling serialize_value on
+every cell, FastAPI's jsonable_encoder walking the result, then JSONResponse rendering.
+"after" is the compiled RowEncoder feeding orjson, as rows and as columnar.
+
+    cd app/backend && python -m bench.serialization_bench [--rows 10000] [--repeat 20]
+"""
+import argparse
+import datetime
+import json
+import random
+import timeit
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from pymysql.constants import FIELD_TYPE
+
+from api.metrics import serialize_value
+from core.serialization import RowEncoder, dumps
+
+DESCRIPTION = [
+    ("cloud", FIELD_TYPE.VAR_STRING),
+    ("month_year", FIELD_TYPE.VAR_STRING),
+    ("service", FIELD_TYPE.VAR_STRING),
+    ("total_amount", FIELD_TYPE.NEWDECIMAL),
+    ("pct_of_total", FIELD_TYPE.NEWDECIMAL),
+    ("retrieved_at", FIELD_TYPE.TIMESTAMP),
+]
+
+
+def make_rows(count):
+    now = datetime.datetime(2025, 1, 15, 12, 0, 0)
+    services = ["EC2", "S3", "RDS", "Lambda", "DynamoDB", "TOTAL"]
+    return [
+        (
+            random.choice(["AWS", "AZURE", "GCP"]),
+            f"2025-{i % 12 + 1:02d}",
+            services[i % len(services)],
+            Decimal(f"{random.uniform(0, 10):.2f}"),
+            Decimal(f"{random.uniform(0, 100):.2f}"),
+            now - datetime.timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def before(rows):
+    columns = [desc[0] for desc in DESCRIPTION]
+    payload = [
+        {columns[i]: serialize_value(row[i]) for i in range(len(columns))}
+        for row in rows
+    ]
+    # what FastAPI did with the returned list: jsonable_encoder + JSONResponse.render
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def after(rows):
+    return dumps(RowEncoder(DESCRIPTION).encode(rows).to_dicts())
+
+
+def after_columnar(rows):
+    return dumps(RowEncoder(DESCRIPTION).encode(rows).to_columnar())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    assert json.loads(before(rows)) == json.loads(after(rows))
+
+    results = {}
+    for name, fn in [("before", before), ("after", after), ("after_columnar", after_columnar)]:
+        best = min(timeit.repeat(lambda: fn(rows), number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"{name:15} {best * 1000:8.2f} ms per {args.rows} rows  ({len(fn(rows)):,} bytes)")
+
+    print(f"\nspeed-up: rows x{results['before'] / results['after']:.1f}, "
+          f"columnar x{results['before'] / results['after_columnar']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
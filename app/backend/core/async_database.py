@@ -0,0 +1,95 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import aiomysql
+
+from core.database import PoolTimeoutError
+from core.replicas import split_host
+
+# ------------------------------
+# Process-wide async pools (primary under None, one per read replica)
+# ------------------------------
+_pools = {}
+_pool_lock = asyncio.Lock()
+
+
+async def get_async_pool(replica: str | None = None):
+    """Return the process-wide aiomysql pool for the primary or a replica, created from the same env vars as the sync pool."""
+    pool = _pools.get(replica)
+    if pool is None:
+        async with _pool_lock:
+            pool = _pools.get(replica)
+            if pool is None:
+                host = os.environ.get("DB_HOST")
+                port = int(os.environ.get("DB_PORT", 3306))
+                if replica:
+                    host, port = split_host(replica, port)
+                dbname = os.environ.get("DB_NAME")
+                user = os.environ.get("DB_USER")
+                password = os.environ.get("DB_PASS")
+                if not all([host, dbname, user, password]):
+                    raise ValueError("DB_HOST, DB_NAME, DB_USER, and DB_PASSWORD must be set")
+
+                pool = _pools[replica] = await aiomysql.create_pool(
+                    host=host,
+                    port=port,
+                    user=user,
+                    password=password,
+                    db=dbname,
+                    minsize=int(os.environ.get("DB_POOL_MIN_SIZE", 1)),
+                    maxsize=int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+                    pool_recycle=int(float(os.environ.get("DB_POOL_MAX_LIFETIME", 1800))),
+                    autocommit=True,
+                )
+    return pool
+
+
+@asynccontextmanager
+async def async_pooled_connection(timeout: float | None = None, replica: str | None = None):
+    """Borrow a connection from the async pool; it is closed instead of reused if the block raises."""
+    pool = await get_async_pool(replica)
+    timeout = float(os.environ.get("DB_POOL_TIMEOUT", 5)) if timeout is None else timeout
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), timeout)
+    except asyncio.TimeoutError:
+        raise PoolTimeoutError(
+            f"No database connection available within {timeout}s (max_size={pool.maxsize})"
+        ) from None
+
+    try:
+        yield conn
+    except BaseException:
+        conn.close()
+        raise
+    finally:
+        pool.release(conn)
+
+
+def _stats(pool):
+    return {
+        "min_size": pool.minsize,
+        "max_size": pool.maxsize,
+        "size": pool.size,
+        "idle": pool.freesize,
+        "in_use": pool.size - pool.freesize,
+    }
+
+
+def async_pool_stats():
+    pool = _pools.get(None)
+    if pool is None:
+        return {"size": 0, "idle": 0, "in_use": 0}
+    return _stats(pool)
+
+
+def async_replica_pool_stats() -> dict:
+    return {replica: _stats(pool) for replica, pool in list(_pools.items()) if replica is not None}
+
+
+async def close_async_pool():
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        pool.close()
+        await pool.wait_closed()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from core.shared_cache import create_backend
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class CacheEntry:
+    __slots__ = ("value", "version", "stored_at", "checked_at", "variants")
+
+    def __init__(self, value, version):
+        now = time.monotonic()
+        self.value = value
+        self.version = version
+        self.stored_at = now
+        self.checked_at = now
+        # Encoded forms of value (e.g. JSON bytes per format), rendered at most once per entry
+        self.variants = {}
+
+    def variant(self, name, render):
+        body = self.variants.get(name)
+        if body is None:
+            body = self.variants[name] = render()
+        return body
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache for query results, versioned by the source table's latest ``retrieved_at``.
+
+    An entry younger than ``ttl`` is served as is. Past that it is revalidated with the
+    cheap version probe: an unchanged version only refreshes the entry's clock, a new one
+    reloads the rows. Within ``stale_ttl`` after expiry the old value is served right away
+    while that revalidation runs in the background (stale-while-revalidate).
+
+    With a ``shared`` backend (core.shared_cache) a reload first looks for a value another
+    process stored at the probed version, and stores what it loads for the others.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0, stale_ttl: float = 300.0, shared=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.shared = shared
+
+        self._entries = OrderedDict()
+        self._refreshing = {}
+        self._loads = SingleFlight()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "invalidations": 0,
+            "evictions": 0,
+            "refresh_errors": 0,
+            "shared_hits": 0,
+            "shared_errors": 0,
+        }
+
+    async def get_or_load_entry(self, key, load, probe):
+        """
+        Return the CacheEntry for ``key``; its version is what ETags are built from.
+
+        ``load`` is an async callable returning a fresh value, ``probe`` an async callable
+        returning the current data version.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            age = time.monotonic() - entry.checked_at
+            if age < self.ttl:
+                self._stats["hits"] += 1
+                return entry
+            if age < self.ttl + self.stale_ttl:
+                self._stats["stale_hits"] += 1
+                self._schedule_refresh(key, entry, load, probe)
+                return entry
+
+        # Concurrent misses for one key share a single probe + load
+        return await self._loads.do(key, lambda: self._load(key, entry, load, probe))
+
+    def peek(self, key):
+        """Return the entry for ``key`` if it is still within its TTL, without touching counters."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.checked_at < self.ttl:
+            return entry
+        return None
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "refreshing": len(self._refreshing),
+            "coalesced_misses": self._loads.stats()["coalesced"],
+            **self._stats,
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+    def expire(self, match):
+        """
+        Force revalidation of every entry whose key satisfies ``match``.
+
+        The entries stay cached: the next read probes the version and reloads only if the
+        data actually changed.
+        """
+        expired = 0
+        for key, entry in self._entries.items():
+            if match(key):
+                entry.checked_at = float("-inf")
+                expired += 1
+        return expired
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+    async def _load(self, key, entry, load, probe):
+        # Probe before loading so a write landing in between shows up as a newer version next time
+        version = await probe()
+        if entry is not None and version == entry.version:
+            entry.checked_at = time.monotonic()
+            self._stats["revalidations"] += 1
+            return entry
+
+        self._stats["misses"] += 1
+        if entry is not None:
+            self._stats["invalidations"] += 1
+        return self._store(key, await self._fetch(key, version, load), version)
+
+    async def _fetch(self, key, version, load):
+        """Value for ``key`` at ``version``: from the shared tier when it has that version, else ``load()``."""
+        if self.shared is None:
+            return await load()
+        try:
+            shared = await self.shared.get(key)
+        except Exception:
+            # The shared tier is an optimization; fall back to the database
+            self._stats["shared_errors"] += 1
+            logger.warning("Shared cache read failed for %s", key, exc_info=True)
+            shared = None
+        if shared is not None and shared[1] == version:
+            self._stats["shared_hits"] += 1
+            return shared[0]
+
+        value = await load()
+        try:
+            await self.shared.set(key, value, version, self.ttl + self.stale_ttl)
+        except Exception:
+            self._stats["shared_errors"] += 1
+            logger.warning("Shared cache write failed for %s", key, exc_info=True)
+        return value
+
+    def _store(self, key, value, version):
+        entry = self._entries[key] = CacheEntry(value, version)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+        return entry
+
+    def _schedule_refresh(self, key, entry, load, probe):
+        if key in self._refreshing:
+            return
+        task = asyncio.get_running_loop().create_task(self._revalidate(key, entry, load, probe))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _revalidate(self, key, entry, load, probe):
+        try:
+            version = await probe()
+            if version == entry.version:
+                entry.checked_at = time.monotonic()
+                self._stats["revalidations"] += 1
+                return
+            value = await self._fetch(key, version, load)
+            self._stats["invalidations"] += 1
+            self._store(key, value, version)
+        except Exception:
+            self._stats["refresh_errors"] += 1
+            logger.warning("Background cache refresh failed for %s", key, exc_info=True)
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", 256)),
+    ttl=float(os.environ.get("CACHE_TTL_SECONDS", 30)),
+    stale_ttl=float(os.environ.get("CACHE_STALE_SECONDS", 300)),
+    shared=create_backend(os.environ.get("CACHE_BACKEND")),
+)
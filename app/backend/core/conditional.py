@@ -0,0 +1,73 @@
+import datetime
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag derived from the request identity and the data version."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def to_utc(version):
+    """retrieved_at is written as naive UTC by the worker."""
+    if not isinstance(version, datetime.datetime):
+        return None
+    if version.tzinfo is None:
+        version = version.replace(tzinfo=datetime.timezone.utc)
+    return version.astimezone(datetime.timezone.utc).replace(microsecond=0)
+
+
+# Compressed bodies carry the encoding in their ETag ("abc-gzip"), since a strong
+# validator must differ between representations; all of them validate the same data.
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def etag_for_encoding(etag: str, encoding: str | None) -> str:
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def matching_etag(if_none_match: str, etag: str):
+    """Return the client's tag from If-None-Match that validates ``etag``, or None."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        base = tag.removeprefix("W/")
+        for suffix in ENCODING_SUFFIXES:
+            if base.endswith(suffix + '"'):
+                base = base[: -len(suffix) - 1] + '"'
+                break
+        if base == etag:
+            return tag.removeprefix("W/")
+    return None
+
+
+def validator_headers(etag: str, last_modified) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request_headers, etag: str, last_modified) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since (RFC 9110 §13.2.2).
+
+    If-None-Match wins when both are sent; If-Modified-Since has one-second resolution.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return matching_etag(if_none_match, etag) is not None
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        return last_modified <= since
+
+    return False
@@ -1,11 +1,27 @@
-
+import logging
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import pymysql
 
-def get_db_connection():
-    """Create DB connection using MySQL + PyMySQL."""
+from core.replicas import split_host
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available before the wait timeout."""
+
+
+def get_db_connection(replica: str | None = None):
+    """Create DB connection using MySQL + PyMySQL, to DB_HOST or to a ``host[:port]`` read replica."""
     host = os.environ.get("DB_HOST")
     port = int(os.environ.get("DB_PORT", 3306))
+    if replica:
+        host, port = split_host(replica, port)
     dbname = os.environ.get("DB_NAME")
     user = os.environ.get("DB_USER")
     password = os.environ.get("DB_PASS")
@@ -19,6 +35,282 @@ def get_db_connection():
         user=user,
         password=password,
         db=dbname,
-        cursorclass=pymysql.cursors.Cursor
+        cursorclass=pymysql.cursors.Cursor,
+        # Pooled connections are reused across requests; without autocommit the
+        # first SELECT would pin an InnoDB snapshot and hide newer worker writes.
+        autocommit=True,
     )
     return conn
+
+
+# ------------------------------
+# Connection Pool
+# ------------------------------
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of PyMySQL connections that lives for the whole process.
+
+    - keeps up to ``max_size`` connections open and pre-opens ``min_size`` of them
+    - pings connections that sat idle longer than ``ping_interval`` before handing them out
+    - retires connections older than ``max_lifetime`` seconds
+    - waits at most ``timeout`` seconds for a free connection, then raises PoolTimeoutError
+    """
+
+    def __init__(
+        self,
+        connect=get_db_connection,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_lifetime: float = 1800.0,
+        timeout: float = 5.0,
+        ping_interval: float = 30.0,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "discarded": 0,
+            "health_check_failures": 0,
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+        }
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def open(self):
+        """Pre-open ``min_size`` connections so the first requests skip the handshake."""
+        with self._cond:
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+
+        for opened in range(missing):
+            try:
+                item = _PooledConnection(self._connect())
+            except Exception:
+                # Give back this slot and the ones not opened yet
+                with self._cond:
+                    self._size -= missing - opened
+                    self._cond.notify_all()
+                raise
+            with self._cond:
+                self._stats["created"] += 1
+                self._idle.append(item)
+                self._cond.notify()
+
+    def close(self):
+        """Close idle connections and refuse new checkouts; in-use ones close on release."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for item in idle:
+            _close_quietly(item.conn)
+
+    # -----------------------------
+    # Checkout / Return
+    # -----------------------------
+    def acquire(self, timeout: float | None = None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            item, create = self._take(deadline)
+            if create:
+                try:
+                    item = _PooledConnection(self._connect())
+                except Exception:
+                    self._forget()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+            elif not self._healthy(item):
+                self._discard(item, stat="health_check_failures")
+                continue
+
+            with self._cond:
+                self._stats["checkouts"] += 1
+                self._stats["wait_seconds_total"] += time.monotonic() - started
+            return item
+
+    def release(self, item, discard: bool = False):
+        if discard or self._closed or self._expired(item):
+            self._discard(item, stat="discarded" if discard else "recycled")
+            return
+
+        item.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(item)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: float | None = None):
+        """Borrow a connection; it is dropped instead of reused if the block raises."""
+        item = self.acquire(timeout)
+        try:
+            yield item.conn
+        except BaseException:
+            self.release(item, discard=True)
+            raise
+        else:
+            self.release(item)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                **self._stats,
+            }
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+    def _take(self, deadline):
+        """Return (idle_item, False) or (None, True) when the caller may open a new connection."""
+        expired = []
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError("Connection pool is closed")
+
+                    while self._idle:
+                        # LIFO keeps the warmest connections in rotation
+                        item = self._idle.pop()
+                        if self._expired(item):
+                            self._size -= 1
+                            self._stats["recycled"] += 1
+                            expired.append(item)
+                            continue
+                        return item, False
+
+                    if self._size < self.max_size:
+                        self._size += 1
+                        return None, True
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available within {self.timeout}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+        finally:
+            for item in expired:
+                _close_quietly(item.conn)
+
+    def _healthy(self, item):
+        if time.monotonic() - item.last_used < self.ping_interval:
+            return True
+        try:
+            item.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _expired(self, item):
+        return self.max_lifetime > 0 and time.monotonic() - item.created_at >= self.max_lifetime
+
+    def _discard(self, item, stat):
+        _close_quietly(item.conn)
+        with self._cond:
+            self._stats[stat] += 1
+        self._forget()
+
+    def _forget(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+# ------------------------------
+# Process-wide pools (primary under None, one per read replica)
+# ------------------------------
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(replica: str | None = None) -> ConnectionPool:
+    """Return the process-wide pool for the primary or a replica, creating it from DB_POOL_* env vars on first use."""
+    pool = _pools.get(replica)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(replica)
+            if pool is None:
+                pool = _pools[replica] = ConnectionPool(
+                    connect=(lambda: get_db_connection(replica)) if replica else get_db_connection,
+                    min_size=int(os.environ.get("DB_POOL_MIN_SIZE", 1)),
+                    max_size=int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+                    max_lifetime=float(os.environ.get("DB_POOL_MAX_LIFETIME", 1800)),
+                    timeout=float(os.environ.get("DB_POOL_TIMEOUT", 5)),
+                    ping_interval=float(os.environ.get("DB_POOL_PING_INTERVAL", 30)),
+                )
+    return pool
+
+
+def open_pools(replicas=()):
+    """
+    Pre-open DB_POOL_MIN_SIZE connections in the primary's pool and each replica's. A
+    database that is down is logged, not raised: its pool then connects on first use.
+    """
+    for replica in (None, *replicas):
+        try:
+            get_pool(replica).open()
+        except Exception as exc:
+            logger.warning("Could not pre-open the connection pool of %s: %s", replica or "the primary", exc)
+
+
+def pooled_connection(timeout: float | None = None, replica: str | None = None):
+    """Context manager yielding a connection from the process-wide pool (of ``replica`` if given)."""
+    return get_pool(replica).connection(timeout)
+
+
+def replica_pool_stats() -> dict:
+    return {replica: pool.stats() for replica, pool in list(_pools.items()) if replica is not None}
+
+
+def close_pool():
+    with _pool_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class _Topic:
+    __slots__ = ("probe", "on_change", "subscribers", "task", "version")
+
+    def __init__(self, probe, on_change):
+        self.probe = probe
+        self.on_change = on_change
+        self.subscribers = set()
+        self.task = None
+        self.version = None
+
+
+class ChangeFeed:
+    """
+    Fan-out of data-version changes to any number of subscribers.
+
+    Each topic (e.g. a cloud) has one background poller running its ``probe`` every
+    ``interval`` seconds for as long as it has subscribers, however many there are. When the
+    probed version differs from the last one, every subscriber queue receives one event.
+    Queues are bounded; a subscriber that falls behind loses its oldest events, which is
+    harmless since each event only says "refetch".
+    """
+
+    def __init__(self, interval: float = 5.0, queue_size: int = 8):
+        self.interval = interval
+        self.queue_size = queue_size
+
+        self._topics = {}
+        self._stats = {"probes": 0, "events": 0, "dropped": 0, "probe_errors": 0}
+
+    def subscribe(self, topic, probe, on_change=None) -> asyncio.Queue:
+        """
+        Register a subscriber and return its queue.
+
+        ``probe`` is an async callable returning the topic's current version as a dict;
+        ``on_change(topic, changed)`` runs once per detected change, before subscribers
+        are notified. Only the first subscriber's callables are used while the poller runs.
+        """
+        state = self._topics.get(topic)
+        if state is None:
+            state = self._topics[topic] = _Topic(probe, on_change)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        state.subscribers.add(queue)
+        if state.task is None:
+            state.task = asyncio.create_task(self._poll(topic, state))
+        return queue
+
+    def unsubscribe(self, topic, queue):
+        state = self._topics.get(topic)
+        if state is None:
+            return
+        state.subscribers.discard(queue)
+        if not state.subscribers:
+            # Last client gone: stop probing until someone subscribes again
+            if state.task is not None:
+                state.task.cancel()
+            del self._topics[topic]
+
+    def publish(self, topic, event):
+        state = self._topics.get(topic)
+        if state is None:
+            return
+        self._stats["events"] += 1
+        for queue in state.subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self._stats["dropped"] += 1
+            queue.put_nowait(event)
+
+    async def _poll(self, topic, state):
+        while True:
+            try:
+                version = await state.probe()
+                self._stats["probes"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Keep polling; a failed probe (pool exhausted, DB restart) is retried next tick
+                self._stats["probe_errors"] += 1
+                logger.exception("Change feed probe failed for %r", topic)
+            else:
+                if state.version is not None and version != state.version:
+                    changed = sorted(k for k in version if version[k] != state.version.get(k))
+                    if state.on_change is not None:
+                        state.on_change(topic, changed)
+                    self.publish(topic, {"topic": topic, "changed": changed, "version": version})
+                state.version = version
+            await asyncio.sleep(self.interval)
+
+    async def close(self):
+        tasks = [state.task for state in self._topics.values() if state.task is not None]
+        self._topics.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "topics": {str(topic): len(state.subscribers) for topic, state in self._topics.items()},
+            **self._stats,
+        }
+
+
+change_feed = ChangeFeed(
+    interval=float(os.environ.get("SSE_POLL_SECONDS", 5)),
+    queue_size=int(os.environ.get("SSE_QUEUE_SIZE", 8)),
+)
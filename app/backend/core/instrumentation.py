@@ -0,0 +1,277 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily, Metric
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.utils import floatToGoString
+
+logger = logging.getLogger("uvicorn.error")
+
+# Set (by gunicorn.conf.py with APP_WORKERS > 1) before prometheus_client is imported:
+# the Histograms below then keep their values in per-process files in this directory
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+METRICS_SNAPSHOT_SECONDS = float(os.environ.get("METRICS_SNAPSHOT_SECONDS", 5))
+
+# Latency buckets tuned for an API whose cached responses take well under a millisecond
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Time spent running a query and fetching its rows", ("table",),
+    buckets=LATENCY_BUCKETS,
+)
+DB_ROWS = Histogram("db_query_rows", "Rows returned per query", ("table",), buckets=ROW_BUCKETS)
+SERIALIZE_SECONDS = Histogram(
+    "serialization_duration_seconds", "Time spent turning rows into response bytes", ("stage",),
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def observe_query(table_name: str, seconds: float, row_count: int):
+    DB_QUERY_SECONDS.labels(table_name).observe(seconds)
+    DB_ROWS.labels(table_name).observe(row_count)
+
+
+def timed(stage: str, fn):
+    """Wrap a zero-argument render function so its run time lands in SERIALIZE_SECONDS."""
+    histogram = SERIALIZE_SECONDS.labels(stage)
+
+    def run():
+        started = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return run
+
+
+class RequestStats:
+    """
+    Per-route request latency and response size histograms, plus the in-flight count.
+
+    Only the event loop thread writes here, so observations are plain list increments
+    instead of prometheus_client's locked ones (about 2us each); the totals are turned
+    into metric families when /metrics is scraped.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self._routes = {}
+
+    def route(self, method, route, status):
+        key = (method, route, status)
+        stats = self._routes.get(key)
+        if stats is None:
+            # [latency bucket counts, latency sum, size bucket counts, size sum]
+            stats = self._routes[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, [0] * (len(SIZE_BUCKETS) + 1), 0]
+        return stats
+
+    def observe(self, method, route, status, seconds, size):
+        stats = self.route(method, route, status)
+        stats[0][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        stats[1] += seconds
+        stats[2][bisect_left(SIZE_BUCKETS, size)] += 1
+        stats[3] += size
+
+    def collect(self):
+        latency = HistogramMetricFamily(
+            "http_request_duration_seconds", "Request latency by route", labels=("method", "route", "status")
+        )
+        size = HistogramMetricFamily(
+            "http_response_size_bytes", "Response body size by route (after compression)",
+            labels=("method", "route", "status"),
+        )
+        for (method, route, status), (latency_counts, latency_sum, size_counts, size_sum) in list(self._routes.items()):
+            labels = (method, route, str(status))
+            latency.add_metric(labels, _cumulative(LATENCY_BUCKETS, latency_counts), latency_sum)
+            size.add_metric(labels, _cumulative(SIZE_BUCKETS, size_counts), size_sum)
+        yield latency
+        yield size
+        in_flight = GaugeMetricFamily("http_requests_in_flight", "Requests currently being served")
+        in_flight.add_metric((), self.in_flight)
+        yield in_flight
+
+
+def _cumulative(bounds, counts):
+    buckets, total = [], 0
+    for bound, count in zip((*map(floatToGoString, bounds), "+Inf"), counts):
+        total += count
+        buckets.append((bound, total))
+    return buckets
+
+
+request_stats = RequestStats()
+# Collectors whose values live in this process only (request stats, pools, caches, ...)
+_local_collectors = [request_stats]
+REGISTRY.register(request_stats)
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware recording latency, in-flight requests and response size per route.
+
+    Routes are labelled by their path template (``/api/table/{table_name}``), taken from the
+    endpoint the router resolved, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        request_stats.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_stats.in_flight -= 1
+            request_stats.observe(scope["method"], self._route(scope), status, time.perf_counter() - started, size)
+
+    def _route(self, scope):
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._route_paths is None:
+            self._route_paths = {
+                getattr(route, "endpoint", None): route.path for route in scope["app"].routes
+            }
+        return self._route_paths.get(endpoint, "unmatched")
+
+
+class StatsCollector:
+    """
+    Exports a ``stats()`` dict (pool, cache, ...) at scrape time, so it costs nothing per request.
+
+    Keys listed in ``gauges`` are exported as gauges, every other numeric key as a counter.
+    """
+
+    def __init__(self, prefix: str, stats, gauges):
+        self.prefix = prefix
+        self.stats = stats
+        self.gauges = set(gauges)
+
+    def collect(self):
+        for key, value in self.stats().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{self.prefix}_{key}"
+            if key in self.gauges:
+                yield GaugeMetricFamily(name, f"{self.prefix} {key}", value=value)
+            else:
+                yield CounterMetricFamily(name, f"{self.prefix} {key}", value=value)
+
+
+def register_stats(prefix: str, stats, gauges):
+    collector = StatsCollector(prefix, stats, gauges)
+    _local_collectors.append(collector)
+    REGISTRY.register(collector)
+
+
+# -----------------------------
+# Multi-worker aggregation
+# -----------------------------
+# With several gunicorn workers a scrape reaches one of them, which has to report
+# for all. prometheus_client's MultiProcessCollector covers the Histograms; the
+# in-process collectors above are snapshotted by every worker into
+# stats_<pid>.json every METRICS_SNAPSHOT_SECONDS (and by the scraped worker on
+# the spot) and merged at scrape time: counters and histograms are summed, gauges
+# are reported per worker with a ``pid`` label.
+def snapshot_path(pid: int) -> str:
+    return os.path.join(MULTIPROC_DIR, f"stats_{pid}.json")
+
+
+def write_snapshot():
+    families = []
+    for collector in _local_collectors:
+        for family in collector.collect():
+            samples = [(sample.name, sample.labels, sample.value) for sample in family.samples]
+            families.append((family.name, family.documentation, family.type, samples))
+    path = snapshot_path(os.getpid())
+    with open(path + ".tmp", "w") as f:
+        json.dump(families, f)
+    os.replace(path + ".tmp", path)
+
+
+def mark_snapshot_dead(pid: int):
+    """Called from gunicorn's child_exit: keep a dead worker's counters, drop its gauges."""
+    path = snapshot_path(pid)
+    try:
+        with open(path) as f:
+            families = json.load(f)
+    except FileNotFoundError:
+        return
+    families = [family for family in families if family[2] != "gauge"]
+    with open(path + ".tmp", "w") as f:
+        json.dump(families, f)
+    os.replace(path + ".tmp", path)
+
+
+class SnapshotCollector:
+    """Merges the stats_<pid>.json snapshots of all workers."""
+
+    def collect(self):
+        merged = {}
+        for path in sorted(glob.glob(os.path.join(MULTIPROC_DIR, "stats_*.json"))):
+            pid = os.path.basename(path)[len("stats_"):-len(".json")]
+            try:
+                with open(path) as f:
+                    families = json.load(f)
+            except (OSError, ValueError):
+                continue  # a worker exited or is replacing its file
+            for name, documentation, kind, samples in families:
+                family = merged.setdefault(name, (documentation, kind, {}))
+                totals = family[2]
+                for sample_name, labels, value in samples:
+                    if kind == "gauge":
+                        labels = dict(labels, pid=pid)
+                    key = (sample_name, tuple(sorted(labels.items())))
+                    totals[key] = totals.get(key, 0) + value
+        for name, (documentation, kind, totals) in merged.items():
+            metric = Metric(name, documentation, kind)
+            for (sample_name, labels), value in totals.items():
+                metric.add_sample(sample_name, dict(labels), value)
+            yield metric
+
+
+async def publish_snapshots():
+    """Background task of every worker in multi-worker mode."""
+    while True:
+        try:
+            write_snapshot()
+        except Exception:
+            logger.warning("Writing the metrics snapshot failed", exc_info=True)
+        await asyncio.sleep(METRICS_SNAPSHOT_SECONDS)
+
+
+def render_metrics():
+    """Body and content type for the /metrics endpoint, for all workers when there are several."""
+    if MULTIPROC_DIR is None:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    write_snapshot()
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    registry.register(SnapshotCollector())
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class ReplicaUnavailable(Exception):
+    """A read replica could not serve a query (connection refused, lost, or its pool exhausted)."""
+
+    def __init__(self, host: str):
+        super().__init__(f"Read replica {host} unavailable")
+        self.host = host
+
+
+def parse_hosts(value: str | None) -> list[str]:
+    """DB_REPLICA_HOSTS: comma-separated ``host`` or ``host:port`` entries."""
+    return [h.strip() for h in (value or "").split(",") if h.strip()]
+
+
+def split_host(spec: str, default_port: int = 3306) -> tuple[str, int]:
+    host, _, port = spec.partition(":")
+    return host, int(port) if port else default_port
+
+
+class _Replica:
+    __slots__ = ("host", "healthy", "lag", "checked_at", "reads", "failures")
+
+    def __init__(self, host):
+        self.host = host
+        self.healthy = False
+        self.lag = math.inf
+        self.checked_at = None
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaRouter:
+    """
+    Picks where a read-only query runs: one of the replicas, or the primary (None).
+
+    Replica lag is measured every ``check_interval`` seconds by comparing the newest
+    timestamps on each replica with the primary's (``measure(host)`` returns
+    ``{table: newest timestamp}``, host None meaning the primary). Replicas more
+    than ``max_lag`` seconds behind, or that failed a check or a query, get no reads until
+    the next check; with none left, reads go to the primary. Among the freshest replicas
+    reads rotate round-robin. Measurements run in the background, never on a request.
+    """
+
+    def __init__(self, hosts, measure=None, max_lag: float = 60.0, check_interval: float = 10.0):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.measure = measure
+
+        self._replicas = [_Replica(host) for host in hosts]
+        self._checked_at = None
+        self._refresh_task = None
+        self._turn = 0
+        self._stats = {"primary_reads": 0, "replica_reads": 0, "fallbacks": 0, "checks": 0, "check_errors": 0}
+
+    @property
+    def hosts(self) -> list[str]:
+        return [r.host for r in self._replicas]
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._replicas) and self.measure is not None
+
+    def choose(self) -> str | None:
+        """Host to read from, or None for the primary. Schedules a lag check when one is due."""
+        if not self.enabled:
+            return None
+        if self._refresh_task is None and (
+            self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval
+        ):
+            self._refresh_task = asyncio.create_task(self.refresh())
+            self._refresh_task.add_done_callback(self._refresh_done)
+
+        candidates = [r for r in self._replicas if r.healthy]
+        if not candidates:
+            self._stats["primary_reads"] += 1
+            return None
+        freshest = min(r.lag for r in candidates)
+        candidates = [r for r in candidates if r.lag == freshest]
+        replica = candidates[self._turn % len(candidates)]
+        self._turn += 1
+        replica.reads += 1
+        self._stats["replica_reads"] += 1
+        return replica.host
+
+    def mark_down(self, host: str):
+        """Take a replica out of rotation after a failed query; the next lag check may restore it."""
+        for replica in self._replicas:
+            if replica.host == host:
+                if replica.healthy:
+                    logger.warning("Read replica %s failed a query; reading from the primary", host)
+                replica.healthy = False
+                replica.failures += 1
+        self._stats["fallbacks"] += 1
+
+    async def refresh(self):
+        self._checked_at = time.monotonic()
+        self._stats["checks"] += 1
+        try:
+            primary = await self.measure(None)
+        except Exception:
+            # Without a reference point keep the previous verdicts; the primary is failing anyway
+            self._stats["check_errors"] += 1
+            logger.warning("Replica lag check failed on the primary", exc_info=True)
+            return
+
+        results = await asyncio.gather(*(self.measure(r.host) for r in self._replicas), return_exceptions=True)
+        now = time.monotonic()
+        for replica, result in zip(self._replicas, results):
+            replica.checked_at = now
+            if isinstance(result, BaseException):
+                self._stats["check_errors"] += 1
+                if replica.healthy:
+                    logger.warning("Read replica %s is down: %s", replica.host, result)
+                replica.healthy, replica.lag = False, math.inf
+                continue
+            replica.lag = self._lag(primary, result)
+            healthy = replica.lag <= self.max_lag
+            if healthy != replica.healthy:
+                logger.warning("Read replica %s %s (lag %.0fs)", replica.host, "in rotation" if healthy else "stale", replica.lag)
+            replica.healthy = healthy
+
+    def stats(self) -> dict:
+        return {
+            "max_lag": self.max_lag,
+            "check_interval": self.check_interval,
+            "healthy": sum(r.healthy for r in self._replicas),
+            **self._stats,
+        }
+
+    def replicas(self) -> list[dict]:
+        return [
+            {
+                "host": r.host,
+                "healthy": r.healthy,
+                "lag_seconds": None if math.isinf(r.lag) else r.lag,
+                "reads": r.reads,
+                "failures": r.failures,
+            }
+            for r in self._replicas
+        ]
+
+    @staticmethod
+    def _lag(primary: dict, replica: dict) -> float:
+        """Seconds the replica's newest timestamps trail the primary's, worst table wins."""
+        lag = 0.0
+        for table, newest in primary.items():
+            if newest is None:
+                continue
+            seen = replica.get(table)
+            if seen is None:
+                return math.inf
+            lag = max(lag, (newest - seen).total_seconds())
+        return lag
+
+    def _refresh_done(self, task):
+        self._refresh_task = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Replica lag check crashed", exc_info=task.exception())
+
+
+class ReadPin:
+    """
+    One server for all the reads of a cache fill: its version probe and its row queries.
+
+    Equally fresh replicas take turns, yet are never exactly in step. A probe answered by
+    one and rows read from another could store older rows under a newer version, which
+    revalidations and ETags would then keep until the next real change.
+    """
+
+    __slots__ = ("router", "replica", "chosen")
+
+    def __init__(self, router):
+        self.router = router
+        self.replica = None
+        self.chosen = False
+
+    def choose(self) -> str | None:
+        if not self.chosen:
+            self.replica = self.router.choose()
+            self.chosen = True
+        return self.replica
+
+    def fall_back(self):
+        """The replica failed: the rest of the fill reads the primary, which is at least as new."""
+        self.replica = None
+
+
+# The ReadPin of the cache fill running in this task, if any (see pinned_reads)
+read_pin = ContextVar("read_pin", default=None)
+
+
+@contextmanager
+def pinned_reads(pin: ReadPin):
+    token = read_pin.set(pin)
+    try:
+        yield pin
+    finally:
+        read_pin.reset(token)
+
+
+replica_router = ReplicaRouter(
+    parse_hosts(os.environ.get("DB_REPLICA_HOSTS")),
+    max_lag=float(os.environ.get("DB_REPLICA_MAX_LAG", 60)),
+    check_interval=float(os.environ.get("DB_REPLICA_CHECK_SECONDS", 10)),
+)
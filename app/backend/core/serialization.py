@@ -0,0 +1,108 @@
+import datetime
+import json
+from decimal import Decimal
+
+from pymysql.constants import FIELD_TYPE
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt, json is the fallback
+    orjson = None
+
+# MySQL column types whose driver values are not JSON-native
+_DECIMAL_TYPES = {FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL}
+_TEMPORAL_TYPES = {FIELD_TYPE.DATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP}
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+def column_converter(type_code):
+    """Converter for one column, decided from the cursor type code instead of per cell."""
+    if type_code in _DECIMAL_TYPES:
+        return float
+    if type_code in _TEMPORAL_TYPES:
+        return _iso
+    return None
+
+
+class RowSet:
+    """Column names plus JSON-ready row tuples, as produced by a RowEncoder."""
+
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def to_dicts(self):
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+    def to_columnar(self):
+        return {"columns": list(self.columns), "data": self.rows}
+
+
+def row_converter(converters):
+    """Function turning a driver row into a JSON-ready tuple, touching only the converted columns."""
+    pairs = tuple((i, fn) for i, fn in enumerate(converters) if fn)
+
+    def convert(row):
+        row = list(row)
+        for i, fn in pairs:
+            value = row[i]
+            if value is not None:
+                row[i] = fn(value)
+        return tuple(row)
+
+    return convert
+
+
+class RowEncoder:
+    """
+    Row converter built once per (table, column layout).
+
+    Only the Decimal and date/time columns are touched: their (index, converter) pairs
+    are picked from the cursor description up front, with no per-cell type checks.
+    """
+
+    def __init__(self, description):
+        self.columns = tuple(desc[0] for desc in description)
+        converters = [column_converter(desc[1]) for desc in description]
+        self._convert = row_converter(converters) if any(converters) else None
+
+    def encode(self, rows) -> RowSet:
+        if self._convert is None:
+            return RowSet(self.columns, list(rows))
+        convert = self._convert
+        return RowSet(self.columns, [convert(row) for row in rows])
+
+
+_encoders = {}
+
+
+def get_row_encoder(table_name: str, description) -> RowEncoder:
+    key = (table_name, tuple((desc[0], desc[1]) for desc in description))
+    encoder = _encoders.get(key)
+    if encoder is None:
+        encoder = _encoders[key] = RowEncoder(description)
+    return encoder
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """Serialize to JSON bytes with orjson when available, else the standard library."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, separators=(",", ":"), default=_default).encode()
@@ -0,0 +1,214 @@
+import asyncio
+import datetime
+import hashlib
+import logging
+import os
+import time
+
+from core.serialization import RowSet, dumps
+
+logger = logging.getLogger("uvicorn.error")
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - only needed with CACHE_BACKEND=redis://...
+    redis = None
+
+try:
+    from orjson import loads
+except ImportError:  # pragma: no cover - orjson is in requirements.txt, json is the fallback
+    from json import loads
+
+CACHE_INVALIDATION_CHANNEL = "cache-invalidation"
+# Delay before re-subscribing after the pub/sub connection failed, doubling up to the maximum
+SUBSCRIBE_RETRY_SECONDS = float(os.environ.get("CACHE_SUBSCRIBE_RETRY_SECONDS", 1))
+SUBSCRIBE_RETRY_MAX_SECONDS = float(os.environ.get("CACHE_SUBSCRIBE_RETRY_MAX_SECONDS", 30))
+
+
+def shared_key(prefix: str, key) -> str:
+    """Cache keys are tuples of str/int/datetime, whose repr is stable across processes."""
+    return f"{prefix}:{hashlib.sha1(repr(key).encode()).hexdigest()}"
+
+
+# -----------------------------
+# Wire format
+# -----------------------------
+# Values and versions cross the network as tagged JSON, never as pickles: whoever
+# can write to the cache server can at worst poison a response, not run code here.
+# Cached values are RowSets, tuples of RowSets and plain JSON dicts; versions are
+# datetimes, None or lists of them.
+def encode_value(value):
+    if isinstance(value, RowSet):
+        return {"rowset": {"columns": list(value.columns), "rows": value.rows}}
+    if isinstance(value, datetime.datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, tuple):
+        return {"tuple": [encode_value(item) for item in value]}
+    if isinstance(value, list):
+        return {"list": [encode_value(item) for item in value]}
+    if isinstance(value, dict):
+        return {"dict": {str(k): encode_value(v) for k, v in value.items()}}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return {"value": value}
+    raise TypeError(f"Cannot store {type(value).__name__} in the shared cache")
+
+
+def decode_value(data):
+    (tag, payload), = data.items()
+    if tag == "rowset":
+        return RowSet(tuple(payload["columns"]), [tuple(row) for row in payload["rows"]])
+    if tag == "datetime":
+        return datetime.datetime.fromisoformat(payload)
+    if tag == "tuple":
+        return tuple(decode_value(item) for item in payload)
+    if tag == "list":
+        return [decode_value(item) for item in payload]
+    if tag == "dict":
+        return {k: decode_value(v) for k, v in payload.items()}
+    if tag == "value":
+        return payload
+    raise ValueError(f"Unknown shared cache tag {tag!r}")
+
+
+def encode_entry(value, version) -> bytes:
+    return dumps({"value": encode_value(value), "version": encode_value(version)})
+
+
+def decode_entry(payload):
+    """(value, version) from encode_entry's bytes."""
+    data = loads(payload)
+    return decode_value(data["value"]), decode_value(data["version"])
+
+
+def decode_message(payload) -> dict:
+    message = loads(payload)
+    if not isinstance(message, dict):
+        raise ValueError("Invalidation message is not a JSON object")
+    return message
+
+
+class LocalCacheBackend:
+    """
+    In-process stand-in for the shared tier, with the same interface as RedisCacheBackend.
+
+    Useful for tests and single-process runs; it shares nothing between processes.
+    Keys carry window starts that move on (every minute for minute history), so once
+    it holds more than ``max_entries`` items, expired ones are dropped, then the oldest.
+    """
+
+    def __init__(self, prefix: str = "metrics", max_entries: int = 1024):
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self._store = {}
+        self._handlers = {}
+
+    async def get(self, key):
+        """Return (value, version) stored for ``key``, or None."""
+        item = self._store.get(shared_key(self.prefix, key))
+        if item is None:
+            return None
+        expires_at, payload = item
+        if time.monotonic() >= expires_at:
+            return None
+        return decode_entry(payload)
+
+    async def set(self, key, value, version, ttl: float):
+        # Encoded like the Redis backend, so values behave the same (copies, JSON-safe)
+        payload = encode_entry(value, version)
+        name = shared_key(self.prefix, key)
+        # Re-inserted, so the dict stays in write order for pruning
+        self._store.pop(name, None)
+        self._store[name] = (time.monotonic() + ttl, payload)
+        if len(self._store) > self.max_entries:
+            self._prune()
+
+    def _prune(self):
+        now = time.monotonic()
+        self._store = {name: item for name, item in self._store.items() if item[0] > now}
+        for name in list(self._store)[:len(self._store) - self.max_entries]:
+            del self._store[name]
+
+    async def publish(self, channel: str, message: dict):
+        for handler in self._handlers.get(channel, ()):
+            handler(decode_message(dumps(message)))
+
+    async def subscribe(self, channel: str, handler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def close(self):
+        self._handlers.clear()
+
+
+class RedisCacheBackend:
+    """
+    Shared cache tier on any Redis-protocol server (Redis, Valkey, KeyDB, ElastiCache).
+
+    Values are JSON-encoded ``(value, version)`` pairs with a TTL (see encode_entry);
+    invalidation signals are JSON objects sent over pub/sub. The subscription runs in
+    the background and reconnects after failures: while it is down, entries this process
+    holds are still revalidated against the database once their TTL is up.
+    """
+
+    def __init__(self, url: str, prefix: str = "metrics"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND is a redis:// URL but the redis package is not installed")
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._listener = None
+
+    async def get(self, key):
+        payload = await self._client.get(shared_key(self.prefix, key))
+        return None if payload is None else decode_entry(payload)
+
+    async def set(self, key, value, version, ttl: float):
+        payload = encode_entry(value, version)
+        await self._client.set(shared_key(self.prefix, key), payload, px=max(1, int(ttl * 1000)))
+
+    async def publish(self, channel: str, message: dict):
+        await self._client.publish(f"{self.prefix}:{channel}", dumps(message))
+
+    async def subscribe(self, channel: str, handler):
+        """Call ``handler`` with every message on ``channel``; never raises, failures are logged and retried."""
+        self._listener = asyncio.create_task(self._listen(f"{self.prefix}:{channel}", handler))
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        await self._client.aclose()
+
+    async def _listen(self, channel: str, handler):
+        delay = SUBSCRIBE_RETRY_SECONDS
+        while True:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                delay = SUBSCRIBE_RETRY_SECONDS
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        handler(decode_message(message["data"]))
+                    except Exception:
+                        logger.exception("Cache invalidation handler failed")
+            except Exception as e:
+                logger.warning("Cache invalidation subscription to %s failed, retrying in %gs: %s", channel, delay, e)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, SUBSCRIBE_RETRY_MAX_SECONDS)
+
+
+def create_backend(spec: str | None):
+    """CACHE_BACKEND: empty (process-local cache only), ``local``, or a ``redis://`` / ``rediss://`` URL."""
+    if not spec:
+        return None
+    prefix = os.environ.get("CACHE_KEY_PREFIX", "metrics")
+    if spec == "local":
+        return LocalCacheBackend(prefix)
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(spec, prefix)
+    raise ValueError(f"Unsupported CACHE_BACKEND {spec!r}")
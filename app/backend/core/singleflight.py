@@ -0,0 +1,38 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key starts ``fn()`` as a task; callers arriving while it runs
+    await that same task and get its result or its exception. The task is shielded, so
+    one waiter being cancelled (e.g. its client disconnected) does not abort the work
+    for the others. Once it finishes the key is released; later calls run ``fn`` again.
+    Results are shared, so callers must not mutate them.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    async def do(self, key, fn):
+        self._stats["calls"] += 1
+        task = self._calls.get(key)
+        if task is None:
+            self._stats["executions"] += 1
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._release(key, task))
+        else:
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), **self._stats}
+
+    def _release(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception so an error nobody awaited anymore is not reported as unhandled
+        if not task.cancelled():
+            task.exception()
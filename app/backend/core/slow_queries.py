@@ -0,0 +1,156 @@
+import datetime
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("uvicorn.error")
+
+FULL_SCAN_ACCESS_TYPES = {"ALL", "index"}
+
+
+def plan_problems(plan):
+    """Walk an EXPLAIN FORMAT=JSON document and describe every full scan or filesort in it."""
+    problems = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            table = node.get("table")
+            # A derived table is always read whole from its materialized result; the
+            # reads that fill it are checked inside materialized_from_subquery
+            if (
+                isinstance(table, dict)
+                and table.get("access_type") in FULL_SCAN_ACCESS_TYPES
+                and "materialized_from_subquery" not in table
+            ):
+                problems.append(f"full scan ({table['access_type']}) on {table.get('table_name')}")
+            if node.get("using_filesort"):
+                problems.append("filesort")
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(plan)
+    return problems
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+class SlowQueryLog:
+    """
+    Bounded log of queries slower than ``threshold`` seconds, with their EXPLAIN plan.
+
+    A slow query is kept with probability ``sample_rate`` and at most ``max_per_minute``
+    times per minute (token bucket), so a slow period cannot flood the log or the
+    database with EXPLAINs. The newest ``size`` records are kept in memory.
+    """
+
+    def __init__(self, threshold: float = 0.2, sample_rate: float = 1.0, max_per_minute: int = 10, size: int = 100):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.max_per_minute = max_per_minute
+
+        self._records = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._tokens = float(max_per_minute)
+        self._refilled_at = time.monotonic()
+        self._stats = {"slow": 0, "recorded": 0, "sampled_out": 0, "rate_limited": 0, "explain_errors": 0}
+
+    def is_slow(self, seconds: float) -> bool:
+        return self.threshold >= 0 and seconds >= self.threshold
+
+    def record(self, table_name: str, query: str, params, seconds: float, row_count: int, server: str | None = None):
+        """
+        Return a new record for a slow query, or None when it is sampled out or rate limited.
+        ``server`` is the read replica it ran on, None for the primary.
+        """
+        with self._lock:
+            self._stats["slow"] += 1
+            if random.random() >= self.sample_rate:
+                self._stats["sampled_out"] += 1
+                return None
+            if not self._take_token():
+                self._stats["rate_limited"] += 1
+                return None
+            self._stats["recorded"] += 1
+            record = {
+                "at": datetime.datetime.utcnow().isoformat(timespec="seconds"),
+                "table": table_name,
+                "server": server or "primary",
+                "query": " ".join(query.split()),
+                "params": [_jsonable(p) for p in params],
+                "duration_ms": round(seconds * 1000, 2),
+                "rows": row_count,
+                "plan": None,
+                "problems": None,
+                "explain_error": None,
+            }
+            self._records.append(record)
+
+        logger.warning(
+            "Slow query on %s took %.1f ms (%d rows): %s %s",
+            table_name, seconds * 1000, row_count, record["query"], record["params"],
+        )
+        return record
+
+    def attach_plan(self, record, explain_output):
+        """Store the EXPLAIN FORMAT=JSON output (a JSON string) on ``record``."""
+        plan = json.loads(explain_output)
+        record["plan"] = plan
+        record["problems"] = plan_problems(plan)
+
+    def explain_failed(self, record, error: Exception):
+        with self._lock:
+            self._stats["explain_errors"] += 1
+        record["explain_error"] = str(error)
+        logger.warning("EXPLAIN failed for slow query on %s: %s", record["table"], error)
+
+    def records(self, table_name: str | None = None, limit: int = 50):
+        """Newest first, optionally for one table."""
+        with self._lock:
+            records = list(self._records)
+        records.reverse()
+        if table_name:
+            records = [r for r in records if r["table"] == table_name]
+        return records[:limit]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold * 1000,
+                "sample_rate": self.sample_rate,
+                "max_per_minute": self.max_per_minute,
+                "size": len(self._records),
+                **self._stats,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.max_per_minute, self._tokens + (now - self._refilled_at) * self.max_per_minute / 60)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+# SLOW_QUERY_MS < 0 disables the log
+slow_query_log = SlowQueryLog(
+    threshold=float(os.environ.get("SLOW_QUERY_MS", 200)) / 1000,
+    sample_rate=float(os.environ.get("SLOW_QUERY_SAMPLE_RATE", 1.0)),
+    max_per_minute=int(os.environ.get("SLOW_QUERY_MAX_PER_MINUTE", 10)),
+    size=int(os.environ.get("SLOW_QUERY_LOG_SIZE", 100)),
+)
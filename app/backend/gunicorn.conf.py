@@ -0,0 +1,55 @@
+"""
+Production server settings: ``gunicorn -c gunicorn.conf.py api.metrics:app`` (or APP_WORKERS=N python main.py).
+
+Each worker is a uvicorn event loop (uvloop and httptools when installed). The app is
+imported once in the master and forked (preload), so workers start fast and share the
+imported code pages; pools, caches and background tasks are created per worker on first
+use. Point CACHE_BACKEND at a Redis server so the workers share cached results.
+
+With more than one worker /metrics is aggregated over all of them (prometheus_client
+multiprocess mode, see core.instrumentation). PROMETHEUS_MULTIPROC_DIR must be set
+before the app imports prometheus_client, so it is set here; without it a temporary
+directory is used. It is emptied when the server starts.
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = f"{os.environ.get('APP_HOST', '0.0.0.0')}:{os.environ.get('APP_PORT', 8000)}"
+workers = int(os.environ.get("APP_WORKERS") or multiprocessing.cpu_count())
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("APP_PRELOAD", "true").lower() == "true"
+
+if workers > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="metrics-api-prometheus-")
+
+# SSE streams stay open; the timeout only has to catch a worker whose loop is stuck
+timeout = int(os.environ.get("APP_WORKER_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("APP_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("APP_KEEPALIVE", 5))
+# Recycle workers now and then so slow leaks cannot grow without bound (0 = never)
+max_requests = int(os.environ.get("APP_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = None
+loglevel = os.environ.get("APP_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        # Values left by an earlier run would be added to this one's
+        for path in glob.glob(os.path.join(directory, "*.db")) + glob.glob(os.path.join(directory, "stats_*.json")):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        from core.instrumentation import mark_snapshot_dead
+
+        multiprocess.mark_process_dead(worker.pid)
+        mark_snapshot_dead(worker.pid)
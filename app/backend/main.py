@@ -1,4 +1,5 @@
 import os
+import sys
 import uvicorn
 from api.metrics import app
 
@@ -6,6 +7,8 @@ if __name__ == "__main__":
     host = os.environ.get("APP_HOST", "0.0.0.0")
     port = int(os.environ.get("APP_PORT", 8000))
     reload = os.environ.get("APP_RELOAD", "false").lower() == "true"
+    # APP_WORKERS > 1 runs the production server: gunicorn with uvicorn workers (gunicorn.conf.py)
+    workers = int(os.environ.get("APP_WORKERS", 1))
 
     print(f"\n 🚀 Starting FastAPI server at: http://{host}:{port}")
     print(f" 📖 Swagger docs: http://{host}:{port}/docs")
@@ -17,8 +20,20 @@ if __name__ == "__main__":
     print(f" Azure Status: http://{host}:{port}/api/azure/status")
     print(f" GCP Costs:    http://{host}:{port}/api/gcp/costs")
     print(f" GCP Status:   http://{host}:{port}/api/gcp/status")
+    print(f" AWS Dashboard:   http://{host}:{port}/api/aws/dashboard")
+    print(f" Azure Dashboard: http://{host}:{port}/api/azure/dashboard")
+    print(f" GCP Dashboard:   http://{host}:{port}/api/gcp/dashboard")
+    print(f" Summary:      http://{host}:{port}/api/summary")
+    print(f" AWS Updates:   http://{host}:{port}/api/stream/aws")
+    print(f" Azure Updates: http://{host}:{port}/api/stream/azure")
+    print(f" GCP Updates:   http://{host}:{port}/api/stream/gcp")
     print("\n ✅ Only explicit endpoints are available (AWS, Azure, GCP).\n")
 
+    if workers > 1 and not reload:
+        print(f" 🧵 Workers: {workers} (gunicorn + uvicorn, preloaded)\n")
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        os.execvp(sys.executable, [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "api.metrics:app"])
+
     uvicorn.run(
         "api.metrics:app",
         host=host,
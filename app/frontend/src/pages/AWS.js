@@ -10,12 +10,10 @@ function AWS() {
   useEffect(() => {
     async function fetchCloudData() {
       try {
-        const ec2Res = await fetch("/api/aws/status");
-        const costRes = await fetch("/api/aws/costs");
-        if (!ec2Res.ok || !costRes.ok) throw new Error("Failed fetching AWS data");
+        const res = await fetch("/api/aws/dashboard");
+        if (!res.ok) throw new Error("Failed fetching AWS data");
 
-        const ec2Data = await ec2Res.json();
-        const costData = await costRes.json();
+        const { status: ec2Data, costs: costData } = await res.json();
 
         setCloudData({ ec2: ec2Data, costs: costData });
 
@@ -23,7 +21,7 @@ function AWS() {
           const sortedMonths = [...new Set(costData.map((c) => c.month_year))]
             .sort()
             .reverse();
-          setSelectedMonth(sortedMonths[0]);
+          setSelectedMonth((current) => current || sortedMonths[0]);
         }
         setLoading(false);
       } catch (err) {
@@ -32,6 +30,11 @@ function AWS() {
       }
     }
     fetchCloudData();
+
+    // The backend pushes one "update" event per worker write; refetch only then
+    const events = new EventSource("/api/stream/aws");
+    events.addEventListener("update", fetchCloudData);
+    return () => events.close();
   }, []);
 
   if (loading) return <div className="loading">Loading AWS dashboard...</div>;
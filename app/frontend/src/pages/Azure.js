@@ -10,12 +10,10 @@ function Azure() {
   useEffect(() => {
     async function fetchCloudData() {
       try {
-        const vmRes = await fetch("/api/azure/status");
-        const costRes = await fetch("/api/azure/costs");
-        if (!vmRes.ok || !costRes.ok) throw new Error("Failed fetching Azure data");
+        const res = await fetch("/api/azure/dashboard");
+        if (!res.ok) throw new Error("Failed fetching Azure data");
 
-        const vmData = await vmRes.json();
-        const costData = await costRes.json();
+        const { status: vmData, costs: costData } = await res.json();
 
         setCloudData({ vm: vmData, costs: costData });
 
@@ -23,7 +21,7 @@ function Azure() {
           const sortedMonths = [...new Set(costData.map((c) => c.month_year))]
             .sort()
             .reverse();
-          setSelectedMonth(sortedMonths[0]);
+          setSelectedMonth((current) => current || sortedMonths[0]);
         }
         setLoading(false);
       } catch (err) {
@@ -32,6 +30,11 @@ function Azure() {
       }
     }
     fetchCloudData();
+
+    // The backend pushes one "update" event per worker write; refetch only then
+    const events = new EventSource("/api/stream/azure");
+    events.addEventListener("update", fetchCloudData);
+    return () => events.close();
   }, []);
 
   if (loading) return <div className="loading">Loading Azure dashboard...</div>;
@@ -10,12 +10,10 @@ function GCP() {
   useEffect(() => {
     async function fetchCloudData() {
       try {
-        const gceRes = await fetch("/api/gcp/status");
-        const costRes = await fetch("/api/gcp/costs");
-        if (!gceRes.ok || !costRes.ok) throw new Error("Failed fetching GCP data");
+        const res = await fetch("/api/gcp/dashboard");
+        if (!res.ok) throw new Error("Failed fetching GCP data");
 
-        const gceData = await gceRes.json();
-        const costData = await costRes.json();
+        const { status: gceData, costs: costData } = await res.json();
 
         setCloudData({ gce: gceData, costs: costData });
 
@@ -23,7 +21,7 @@ function GCP() {
           const sortedMonths = [...new Set(costData.map((c) => c.month_year))]
             .sort()
             .reverse();
-          setSelectedMonth(sortedMonths[0]);
+          setSelectedMonth((current) => current || sortedMonths[0]);
         }
         setLoading(false);
       } catch (err) {
@@ -32,6 +30,11 @@ function GCP() {
       }
     }
     fetchCloudData();
+
+    // The backend pushes one "update" event per worker write; refetch only then
+    const events = new EventSource("/api/stream/gcp");
+    events.addEventListener("update", fetchCloudData);
+    return () => events.close();
   }, []);
 
   if (loading) return <div className="loading">Loading GCP dashboard...</div>;
@@ -1,5 +1,8 @@
 import os
+import time
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import boto3
 from botocore.config import Config
@@ -19,15 +22,52 @@ boto_cfg = Config(retries={"max_attempts": 5, "mode": "standard"})
 ec2 = boto3.client("ec2", region_name=AWS_REGION, config=boto_cfg)
 ce = boto3.client("ce", region_name=AWS_REGION, config=boto_cfg)
 
+# Regions scanned at the same time by the EC2 inventory
+EC2_SCAN_WORKERS = int(os.getenv("EC2_SCAN_WORKERS", "8"))
+
+# Regional EC2 clients, built once and reused across runs (creating a client loads
+# the service model and sets up a connection pool; clients are thread-safe)
+_regional_clients = {AWS_REGION: ec2}
+_regional_clients_lock = threading.Lock()
+
+# Per-region timing of the latest scan: {region: {"seconds", "instances", "error"}}
+last_scan_stats = {}
+
+# Only these states are counted; EC2 filters out the others (pending, stopping, ...)
+# instead of sending them to be skipped here
+COUNTED_STATES = ("running", "stopped", "terminated")
+STATE_FILTER = [{"Name": "instance-state-name", "Values": list(COUNTED_STATES)}]
+EC2_PAGE_SIZE = 1000  # the API maximum, fewest round trips
+
+# describe_instances has no field projection: every instance comes with its block
+# devices, network interfaces, tags, ... although only the AZ and state are read.
+# describe_instance_status returns just id, AZ, state and health checks: on a
+# synthetic 20k fleet about an eighth of the bytes and a twentieth of the parse
+# CPU (bench/ec2_inventory.py).
+# EC2_INVENTORY_API=instances keeps describe_instances for roles without
+# ec2:DescribeInstanceStatus.
+EC2_INVENTORY_API = os.getenv("EC2_INVENTORY_API", "status")
+
+
+def regional_ec2(region):
+    client = _regional_clients.get(region)
+    if client is None:
+        with _regional_clients_lock:
+            client = _regional_clients.get(region)
+            if client is None:
+                client = _regional_clients[region] = boto3.client("ec2", region_name=region, config=boto_cfg)
+    return client
+
 # ----------------------------
 # AWS Monthly Cost (dummy + real)
 # ----------------------------
 
-def store_dummy_monthly_cost(conn, cloud="AWS"):
+def store_dummy_monthly_cost(batch, cloud="AWS"):
     """
     Dummy cost generator for AWS with total < $10.
     ⚠️ Replace with fetch_monthly_cost + store_monthly_cost for real-time.
     """
+    cloud = cloud.upper()
     today = datetime.utcnow()
     months = [
         (today.replace(day=1) - timedelta(days=61)).replace(day=1),
@@ -35,7 +75,6 @@ def store_dummy_monthly_cost(conn, cloud="AWS"):
         today.replace(day=1),
     ]
 
-    cur = conn.cursor()
     retrieved_at = datetime.utcnow()
 
     for month_start in months:
@@ -73,22 +112,9 @@ def store_dummy_monthly_cost(conn, cloud="AWS"):
             for s, (cost, pct) in service_costs_pct.items()
         ]
 
-        # Insert into DB
-        cur.executemany(
-            """
-            INSERT INTO cloud_cost_monthly (cloud, month_year, service, total_amount, pct_of_total, retrieved_at)
-            VALUES (%s,%s,%s,%s,%s,%s)
-            ON DUPLICATE KEY UPDATE
-                total_amount=VALUES(total_amount),
-                pct_of_total=VALUES(pct_of_total),
-                retrieved_at=VALUES(retrieved_at)
-        """,
-            rows,
-        )
-        conn.commit()
-        log.info(f"[{cloud}] Stored dummy costs for {month_str}: total={total_amount}")
-
-    cur.close()
+        # Staged; written with the other clouds at the end of the cycle
+        batch.add("cloud_cost_monthly", rows)
+        log.info(f"[{cloud}] Staged dummy costs for {month_str}: total={total_amount}")
 
 
 
@@ -118,8 +144,8 @@ def fetch_monthly_cost(ce_client, start_date, end_date):
     return service_costs, total
 
 
-def store_monthly_cost(conn, cloud, month_year, service_costs):
-    cur = conn.cursor()
+def store_monthly_cost(batch, cloud, month_year, service_costs):
+    cloud = cloud.upper()
     retrieved_at = datetime.utcnow()
     total_amount = sum(cost for cost, pct in service_costs.values())
     service_costs_with_total = {"TOTAL": (total_amount, 100.0)}
@@ -130,50 +156,96 @@ def store_monthly_cost(conn, cloud, month_year, service_costs):
         for s, (cost, pct) in service_costs_with_total.items()
     ]
 
-    cur.executemany(
-        """
-        INSERT INTO cloud_cost_monthly (cloud, month_year, service, total_amount, pct_of_total, retrieved_at)
-        VALUES (%s,%s,%s,%s,%s,%s)
-        ON DUPLICATE KEY UPDATE
-            total_amount=VALUES(total_amount),
-            pct_of_total=VALUES(pct_of_total),
-            retrieved_at=VALUES(retrieved_at)
-    """,
-        rows,
-    )
-
-    conn.commit()
-    cur.close()
-    log.info(f"[{cloud}] Stored {len(rows)} services for {month_year}")
+    batch.add("cloud_cost_monthly", rows)
+    log.info(f"[{cloud}] Staged {len(rows)} services for {month_year}")
 
 
 # ----------------------------
 # AWS EC2 Status
 # ----------------------------
-def fetch_and_aggregate_server_status_all_regions(cloud="AWS"):
-    regions = [r["RegionName"] for r in ec2.describe_regions()["Regions"]]
+def iter_instance_states(client, api=None):
+    """(availability zone, state) of every counted instance visible to ``client``."""
+    pagination = {"PageSize": EC2_PAGE_SIZE}
+    if (api or EC2_INVENTORY_API) == "instances":
+        paginator = client.get_paginator("describe_instances")
+        for page in paginator.paginate(Filters=STATE_FILTER, PaginationConfig=pagination):
+            for reservation in page.get("Reservations", []):
+                for instance in reservation.get("Instances", []):
+                    yield instance["Placement"]["AvailabilityZone"], instance["State"]["Name"]
+        return
+
+    # IncludeAllInstances: stopped and terminated too, not only running ones
+    paginator = client.get_paginator("describe_instance_status")
+    for page in paginator.paginate(IncludeAllInstances=True, Filters=STATE_FILTER, PaginationConfig=pagination):
+        for status in page.get("InstanceStatuses", []):
+            yield status["AvailabilityZone"], status["InstanceState"]["Name"]
+
+
+def scan_region(region):
+    """Instance state counts per AZ of one region: {az: {"running", "stopped", "terminated"}}."""
     agg = {}
+    for az, state in iter_instance_states(regional_ec2(region)):
+        state = state.lower()
+        if az not in agg:
+            agg[az] = {
+                "running": 0,
+                "stopped": 0,
+                "terminated": 0,
+            }
+        if state in agg[az]:
+            agg[az][state] += 1
+    return agg
+
+
+def _timed_scan(region):
+    started = time.monotonic()
+    try:
+        return scan_region(region), None, time.monotonic() - started
+    except Exception as e:
+        return None, e, time.monotonic() - started
+
+
+def scan_all_regions(regions, workers=None):
+    """
+    Scan regions in parallel (EC2_SCAN_WORKERS at a time) and merge the per-region
+    aggregates into {(region, az): counts}. Every region is scanned and timed even if
+    some fail; then the first failure is raised, as a partial inventory would
+    understate the totals.
+    """
+    workers = max(1, min(workers or EC2_SCAN_WORKERS, len(regions) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ec2-scan") as pool:
+        results = list(pool.map(_timed_scan, regions))
+
+    agg, stats, failed = {}, {}, []
+    for region, (partial, error, seconds) in zip(regions, results):
+        stats[region] = {
+            "seconds": round(seconds, 3),
+            "instances": sum(sum(c.values()) for c in partial.values()) if partial else 0,
+            "error": f"{type(error).__name__}: {error}" if error else None,
+        }
+        if error is not None:
+            log.error(f"EC2 scan of {region} failed after {seconds:.2f}s: {error}")
+            failed.append(error)
+            continue
+        for az, counts in partial.items():
+            agg[(region, az)] = counts
+
+    last_scan_stats.clear()
+    last_scan_stats.update(stats)
+    slowest = sorted(stats.items(), key=lambda item: item[1]["seconds"], reverse=True)[:3]
+    log.info(
+        f"Scanned {len(regions)} regions with {workers} workers; slowest: "
+        + ", ".join(f"{region} {s['seconds']:.2f}s" for region, s in slowest)
+    )
+    if failed:
+        raise failed[0]
+    return agg
 
-    for region in regions:
-        regional_client = boto3.client(
-            "ec2", region_name=region, config=boto_cfg
-        )
-        paginator = regional_client.get_paginator("describe_instances")
 
-        for page in paginator.paginate():
-            for reservation in page.get("Reservations", []):
-                for instance in reservation.get("Instances", []):
-                    az = instance["Placement"]["AvailabilityZone"]
-                    state = instance["State"]["Name"].lower()
-
-                    if (region, az) not in agg:
-                        agg[(region, az)] = {
-                            "running": 0,
-                            "stopped": 0,
-                            "terminated": 0,
-                        }
-                    if state in agg[(region, az)]:
-                        agg[(region, az)][state] += 1
+def fetch_and_aggregate_server_status_all_regions(cloud="AWS"):
+    cloud = cloud.upper()
+    regions = [r["RegionName"] for r in ec2.describe_regions()["Regions"]]
+    agg = scan_all_regions(regions)
 
     retrieved_at = datetime.utcnow()
     rows = []
@@ -237,26 +309,11 @@ def fetch_and_aggregate_server_status_all_regions(cloud="AWS"):
     return rows
 
 
-def collect_ec2_status(conn, cloud="AWS"):
+def collect_ec2_status(batch, cloud="AWS"):
     rows = fetch_and_aggregate_server_status_all_regions(cloud=cloud)
-    store_server_status_agg(conn, rows, cloud=cloud)
-
-
-def store_server_status_agg(conn, rows, cloud="AWS"):
-    cur = conn.cursor()
-    cur.executemany(
-        """
-        INSERT INTO server_status_agg (cloud, region, az, running, stopped, `terminated`, retrieved_at)
-        VALUES (%s,%s,%s,%s,%s,%s,%s)
-        ON DUPLICATE KEY UPDATE
-            running=VALUES(running),
-            stopped=VALUES(stopped),
-            `terminated`=VALUES(`terminated`),
-            retrieved_at=VALUES(retrieved_at)
-    """,
-        rows,
-    )
+    store_server_status_agg(batch, rows, cloud=cloud)
+
 
-    conn.commit()
-    cur.close()
-    log.info(f"[{cloud}] Stored {len(rows)} aggregated server status rows")
+def store_server_status_agg(batch, rows, cloud="AWS"):
+    batch.add("server_status_agg", rows)
+    log.info(f"[{cloud}] Staged {len(rows)} aggregated server status rows")
@@ -7,11 +7,12 @@ log = logging.getLogger("azure")
 # ----------------------------
 # Azure Monthly Cost (Dummy)
 # ----------------------------
-def store_dummy_monthly_cost(conn, cloud="Azure"):
+def store_dummy_monthly_cost(batch, cloud="Azure"):
     """
     Dummy Azure Cost Data with total between $11 and $15.
     ⚠️ Replace with Azure Cost Management API in the future.
     """
+    cloud = cloud.upper()
     today = datetime.utcnow()
     months = [
         (today.replace(day=1) - timedelta(days=61)).replace(day=1),
@@ -19,7 +20,6 @@ def store_dummy_monthly_cost(conn, cloud="Azure"):
         today.replace(day=1),
     ]
 
-    cur = conn.cursor()
     retrieved_at = datetime.utcnow()
     services = ["VM", "Storage", "SQL Database", "App Service", "Functions"]
 
@@ -56,34 +56,21 @@ def store_dummy_monthly_cost(conn, cloud="Azure"):
             for s, (cost, pct) in service_costs_pct.items()
         ]
 
-        cur.executemany(
-            """
-            INSERT INTO cloud_cost_monthly (cloud, month_year, service, total_amount, pct_of_total, retrieved_at)
-            VALUES (%s,%s,%s,%s,%s,%s)
-            ON DUPLICATE KEY UPDATE
-                total_amount=VALUES(total_amount),
-                pct_of_total=VALUES(pct_of_total),
-                retrieved_at=VALUES(retrieved_at)
-        """,
-            rows,
-        )
-        conn.commit()
-        log.info(f"[{cloud}] Stored dummy cost data for {month_str}: total={total_amount}")
-
-    cur.close()
+        batch.add("cloud_cost_monthly", rows)
+        log.info(f"[{cloud}] Staged dummy cost data for {month_str}: total={total_amount}")
 
 
 
 # ----------------------------
 # Azure Server Status (Dummy)
 # ----------------------------
-def store_dummy_server_status(conn, cloud="Azure"):
+def store_dummy_server_status(batch, cloud="Azure"):
     """
     Dummy Azure Server Status.
     ⚠️ Replace with Azure Resource Manager API in the future.
     """
+    cloud = cloud.upper()
     retrieved_at = datetime.utcnow()
-    cur = conn.cursor()
 
     regions = ["eastus", "westeurope"]
     azs = ["1", "2", "3"]
@@ -118,19 +105,5 @@ def store_dummy_server_status(conn, cloud="Azure"):
     total_terminated = sum(c["terminated"] for c in region_totals.values())
     rows.append((cloud, "ALL", "ALL", total_running, total_stopped, total_terminated, retrieved_at))
 
-    cur.executemany(
-        """
-        INSERT INTO server_status_agg (cloud, region, az, running, stopped, `terminated`, retrieved_at)
-        VALUES (%s,%s,%s,%s,%s,%s,%s)
-        ON DUPLICATE KEY UPDATE
-            running=VALUES(running),
-            stopped=VALUES(stopped),
-            `terminated`=VALUES(`terminated`),
-            retrieved_at=VALUES(retrieved_at)
-    """,
-        rows,
-    )
-
-    conn.commit()
-    cur.close()
-    log.info(f"[{cloud}] Stored {len(rows)} dummy server status rows")
+    batch.add("server_status_agg", rows)
+    log.info(f"[{cloud}] Staged {len(rows)} dummy server status rows")
@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+
+from history import COST_HISTORY_INSERT, STATUS_HISTORY_INSERT
+from snapshot import HEARTBEAT_UPSERT, SNAPSHOT_TABLES, changed_rows, remember_rows
+
+log = logging.getLogger("batch")
+
+# ----------------------------
+# Batched writes
+# ----------------------------
+# Collection steps do not write to the database themselves. They stage their rows
+# in their cloud's WriteBatch, and once the cycle has collected every cloud the
+# batches are written together: multi-row INSERT ... ON DUPLICATE KEY UPDATE
+# statements of up to WRITE_CHUNK_ROWS rows, in a single transaction with a single
+# commit, instead of an executemany and a commit per month and table.
+WRITE_CHUNK_ROWS = int(os.getenv("WRITE_CHUNK_ROWS", os.getenv("HISTORY_INSERT_BATCH", "1000")))
+
+# Every snapshot row is also appended to its history table
+HISTORY_INSERTS = {
+    "cloud_cost_monthly": COST_HISTORY_INSERT,
+    "server_status_agg": STATUS_HISTORY_INSERT,
+}
+
+
+class WriteBatch:
+    """
+    Rows one cloud's steps produced during a cycle, written later by write_batches.
+
+    The cycle may stop waiting for a slow cloud. Whichever side is second, the
+    provider finishing (close) or the cycle giving up (abandon), learns so, and the
+    provider then writes its batch on its own.
+    """
+
+    def __init__(self, cloud):
+        self.cloud = cloud
+        self.rows = {table: [] for table in SNAPSHOT_TABLES}
+        # Steps that completed, recorded in worker_heartbeat
+        self.steps = []
+        self._lock = threading.Lock()
+        self._state = "collecting"
+
+    def add(self, table, rows):
+        """Stage snapshot rows (and their history samples) of ``table``."""
+        self.rows[table].extend(rows)
+
+    def close(self):
+        """The provider is done. False if the cycle has already given up on it."""
+        with self._lock:
+            if self._state == "abandoned":
+                return False
+            self._state = "ready"
+            return True
+
+    def abandon(self):
+        """The cycle stops waiting. False if the provider finished in the meantime."""
+        with self._lock:
+            if self._state == "ready":
+                return False
+            self._state = "abandoned"
+            return True
+
+
+def insert_rows(cur, statement, rows, chunk_size=None):
+    """Execute ``statement`` (with a ``{values}`` slot) as multi-row chunks; returns the statement count."""
+    chunk_size = chunk_size or WRITE_CHUNK_ROWS
+    if not rows:
+        return 0
+    placeholders = "(" + ",".join(["%s"] * len(rows[0])) + ")"
+    statements = 0
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        cur.execute(statement.format(values=",".join([placeholders] * len(chunk))), [v for row in chunk for v in row])
+        statements += 1
+    return statements
+
+
+def write_batches(conn, batches, chunk_size=None):
+    """
+    Write the rows of all ``batches`` in one transaction: changed snapshot rows,
+    history samples and heartbeats. Returns {"rows", "statements", "commits", "seconds"}.
+    """
+    if not batches:
+        return {"rows": 0, "statements": 0, "commits": 0, "seconds": 0.0}
+    started = time.monotonic()
+    now = datetime.utcnow()
+    written, statements, total = {}, 0, 0
+
+    cur = conn.cursor()
+    conn.start_transaction()
+    try:
+        for table, (_, upsert) in SNAPSHOT_TABLES.items():
+            rows = [row for batch in batches for row in batch.rows[table]]
+            written[table] = changed_rows(table, rows, now)
+            statements += insert_rows(cur, upsert, written[table], chunk_size)
+            statements += insert_rows(cur, HISTORY_INSERTS[table], rows, chunk_size)
+            total += len(written[table]) + len(rows)
+        heartbeats = [(batch.cloud, step, now) for batch in batches for step in batch.steps]
+        statements += insert_rows(cur, HEARTBEAT_UPSERT, heartbeats, chunk_size)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+    for table, rows in written.items():
+        remember_rows(table, rows)
+    stats = {"rows": total, "statements": statements, "commits": 1, "seconds": round(time.monotonic() - started, 3)}
+    changed = ", ".join(f"{table}={len(rows)}" for table, rows in written.items())
+    log.info(
+        f"Wrote {', '.join(b.cloud for b in batches)} in one transaction: {statements} statements, "
+        f"{total} rows ({changed} changed) in {stats['seconds']}s"
+    )
+    return stats
@@ -0,0 +1,262 @@
+"""
+Bytes and botocore deserialization CPU of the EC2 inventory calls, on recorded responses.
+
+Compares what the AWS collector downloads and parses to count instances per AZ:
+
+- describe_instances      full instance documents, all states (the old scan)
+- describe_instances +    the same documents, only running/stopped/terminated,
+  filter                  1000 per page (EC2_INVENTORY_API=instances)
+- describe_instance_status  id, AZ, state and health checks only (the default)
+
+Responses are parsed with botocore's own EC2 parser, so the CPU figures are what the
+worker spends in deserialization. Without recordings a synthetic fleet with
+realistic instance documents is generated. From app/worker:
+
+    python -m bench.ec2_inventory --instances 20000
+    python -m bench.ec2_inventory record --region us-east-1 --out bench/recorded
+    python -m bench.ec2_inventory --recorded bench/recorded
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import botocore.parsers
+import botocore.session
+
+PAGE_SIZE = 1000
+COUNTED_STATES = ("running", "stopped", "terminated")
+# (code, name, share of the fleet)
+STATES = (
+    (16, "running", 0.70),
+    (80, "stopped", 0.20),
+    (48, "terminated", 0.04),
+    (0, "pending", 0.02),
+    (64, "stopping", 0.02),
+    (32, "shutting-down", 0.02),
+)
+VARIANTS = ("describe_instances", "describe_instances_filtered", "describe_instance_status")
+OPERATIONS = {
+    "describe_instances": "DescribeInstances",
+    "describe_instances_filtered": "DescribeInstances",
+    "describe_instance_status": "DescribeInstanceStatus",
+}
+
+
+# ----------------------------
+# Synthetic responses
+# ----------------------------
+INSTANCE_XML = """<item><reservationId>r-{id}</reservationId><ownerId>123456789012</ownerId><groupSet/><instancesSet><item>
+<instanceId>i-{id}</instanceId><imageId>ami-0abcdef1234567890</imageId>
+<instanceState><code>{code}</code><name>{state}</name></instanceState>
+<privateDnsName>ip-10-0-{a}-{b}.ec2.internal</privateDnsName><dnsName>ec2-3-80-{a}-{b}.compute-1.amazonaws.com</dnsName>
+<reason/><keyName>prod-key</keyName><amiLaunchIndex>0</amiLaunchIndex><productCodes/>
+<instanceType>m5.large</instanceType><launchTime>2024-05-01T12:00:00.000Z</launchTime>
+<placement><availabilityZone>{az}</availabilityZone><groupName/><tenancy>default</tenancy></placement>
+<monitoring><state>disabled</state></monitoring><subnetId>subnet-0123456789abcdef0</subnetId><vpcId>vpc-0123456789abcdef0</vpcId>
+<privateIpAddress>10.0.{a}.{b}</privateIpAddress><ipAddress>3.80.{a}.{b}</ipAddress><sourceDestCheck>true</sourceDestCheck>
+<groupSet><item><groupId>sg-0123456789abcdef0</groupId><groupName>web</groupName></item><item><groupId>sg-0fedcba9876543210</groupId><groupName>ssh</groupName></item></groupSet>
+<architecture>x86_64</architecture><rootDeviceType>ebs</rootDeviceType><rootDeviceName>/dev/xvda</rootDeviceName>
+<blockDeviceMapping><item><deviceName>/dev/xvda</deviceName><ebs><volumeId>vol-0a{id}</volumeId><status>attached</status><attachTime>2024-05-01T12:00:01.000Z</attachTime><deleteOnTermination>true</deleteOnTermination></ebs></item>
+<item><deviceName>/dev/sdf</deviceName><ebs><volumeId>vol-0b{id}</volumeId><status>attached</status><attachTime>2024-05-01T12:00:01.000Z</attachTime><deleteOnTermination>false</deleteOnTermination></ebs></item></blockDeviceMapping>
+<virtualizationType>hvm</virtualizationType><clientToken>token-{id}</clientToken>
+<tagSet><item><key>Name</key><value>app-{id}</value></item><item><key>env</key><value>prod</value></item><item><key>team</key><value>platform</value></item>
+<item><key>cost-center</key><value>cc-1234</value></item><item><key>aws:autoscaling:groupName</key><value>asg-web</value></item></tagSet>
+<hypervisor>xen</hypervisor>
+<networkInterfaceSet><item><networkInterfaceId>eni-0{id}</networkInterfaceId><subnetId>subnet-0123456789abcdef0</subnetId><vpcId>vpc-0123456789abcdef0</vpcId>
+<description/><ownerId>123456789012</ownerId><status>in-use</status><macAddress>0e:12:34:56:78:9a</macAddress><privateIpAddress>10.0.{a}.{b}</privateIpAddress>
+<privateDnsName>ip-10-0-{a}-{b}.ec2.internal</privateDnsName><sourceDestCheck>true</sourceDestCheck>
+<groupSet><item><groupId>sg-0123456789abcdef0</groupId><groupName>web</groupName></item></groupSet>
+<attachment><attachmentId>eni-attach-0{id}</attachmentId><deviceIndex>0</deviceIndex><status>attached</status><attachTime>2024-05-01T12:00:00.000Z</attachTime><deleteOnTermination>true</deleteOnTermination><networkCardIndex>0</networkCardIndex></attachment>
+<association><publicIp>3.80.{a}.{b}</publicIp><publicDnsName>ec2-3-80-{a}-{b}.compute-1.amazonaws.com</publicDnsName><ipOwnerId>amazon</ipOwnerId></association>
+<privateIpAddressesSet><item><privateIpAddress>10.0.{a}.{b}</privateIpAddress><privateDnsName>ip-10-0-{a}-{b}.ec2.internal</privateDnsName><primary>true</primary></item></privateIpAddressesSet>
+<ipv6AddressesSet/><interfaceType>interface</interfaceType></item></networkInterfaceSet>
+<iamInstanceProfile><arn>arn:aws:iam::123456789012:instance-profile/app</arn><id>AIPAEXAMPLE{id}</id></iamInstanceProfile>
+<ebsOptimized>true</ebsOptimized><enaSupport>true</enaSupport><cpuOptions><coreCount>1</coreCount><threadsPerCore>2</threadsPerCore></cpuOptions>
+<capacityReservationSpecification><capacityReservationPreference>open</capacityReservationPreference></capacityReservationSpecification>
+<hibernationOptions><configured>false</configured></hibernationOptions>
+<metadataOptions><state>applied</state><httpTokens>required</httpTokens><httpPutResponseHopLimit>2</httpPutResponseHopLimit><httpEndpoint>enabled</httpEndpoint><httpProtocolIpv6>disabled</httpProtocolIpv6><instanceMetadataTags>disabled</instanceMetadataTags></metadataOptions>
+<enclaveOptions><enabled>false</enabled></enclaveOptions><platformDetails>Linux/UNIX</platformDetails><usageOperation>RunInstances</usageOperation>
+<usageOperationUpdateTime>2024-05-01T12:00:00.000Z</usageOperationUpdateTime>
+<privateDnsNameOptions><hostnameType>ip-name</hostnameType><enableResourceNameDnsARecord>false</enableResourceNameDnsARecord><enableResourceNameDnsAAAARecord>false</enableResourceNameDnsAAAARecord></privateDnsNameOptions>
+<maintenanceOptions><autoRecovery>default</autoRecovery></maintenanceOptions><currentInstanceBootMode>legacy-bios</currentInstanceBootMode>
+</item></instancesSet></item>"""
+
+STATUS_XML = """<item><instanceId>i-{id}</instanceId><availabilityZone>{az}</availabilityZone>
+<instanceState><code>{code}</code><name>{state}</name></instanceState>
+<systemStatus><status>{health}</status><details><item><name>reachability</name><status>{check}</status></item></details></systemStatus>
+<instanceStatus><status>{health}</status><details><item><name>reachability</name><status>{check}</status></item></details></instanceStatus>
+<attachedEbsStatus><status>{health}</status><details><item><name>reachability</name><status>{check}</status></item></details></attachedEbsStatus>
+</item>"""
+
+ENVELOPES = {
+    "DescribeInstances": (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<DescribeInstancesResponse xmlns="http://ec2.amazonaws.com/doc/2016-11-15/">'
+        "<requestId>00000000-0000-0000-0000-000000000000</requestId><reservationSet>{items}</reservationSet>{token}"
+        "</DescribeInstancesResponse>"
+    ),
+    "DescribeInstanceStatus": (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<DescribeInstanceStatusResponse xmlns="http://ec2.amazonaws.com/doc/2016-11-15/">'
+        "<requestId>00000000-0000-0000-0000-000000000000</requestId><instanceStatusSet>{items}</instanceStatusSet>{token}"
+        "</DescribeInstanceStatusResponse>"
+    ),
+}
+
+
+def synthetic_fleet(count, seed):
+    rng = random.Random(seed)
+    codes, names, weights = zip(*STATES)
+    for i in range(count):
+        state = rng.choices(range(len(STATES)), weights)[0]
+        yield {
+            "id": f"{i:017x}",
+            "code": codes[state],
+            "state": names[state],
+            "az": f"us-east-1{'abcdef'[i % 6]}",
+            "a": i // 256 % 256,
+            "b": i % 256,
+        }
+
+
+def synthetic_pages(fleet, variant):
+    """Response bodies a variant receives for ``fleet``, PAGE_SIZE items per page."""
+    if variant != "describe_instances":
+        fleet = [i for i in fleet if i["state"] in COUNTED_STATES]
+    operation = OPERATIONS[variant]
+    template = STATUS_XML if operation == "DescribeInstanceStatus" else INSTANCE_XML
+    pages = []
+    for start in range(0, len(fleet), PAGE_SIZE):
+        chunk = fleet[start:start + PAGE_SIZE]
+        items = "".join(
+            template.format(health="ok" if i["state"] == "running" else "not-applicable",
+                            check="passed" if i["state"] == "running" else "not-applicable", **i)
+            for i in chunk
+        )
+        more = start + PAGE_SIZE < len(fleet)
+        token = f"<nextToken>page-{start + PAGE_SIZE}</nextToken>" if more else ""
+        pages.append(ENVELOPES[operation].format(items=items, token=token).encode())
+    return pages or [ENVELOPES[operation].format(items="", token="").encode()]
+
+
+# ----------------------------
+# Recording
+# ----------------------------
+def record(args):
+    """Save the raw response pages of each variant from a real account (read-only calls)."""
+    import boto3
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    client = boto3.client("ec2", region_name=args.region)
+    captured = []
+    client.meta.events.register(
+        "before-parse.ec2.*", lambda response_dict, **_: captured.append(response_dict["body"])
+    )
+    calls = {
+        "describe_instances": ("describe_instances", {}),
+        "describe_instances_filtered": ("describe_instances", {
+            "Filters": [{"Name": "instance-state-name", "Values": list(COUNTED_STATES)}],
+            "PaginationConfig": {"PageSize": PAGE_SIZE},
+        }),
+        "describe_instance_status": ("describe_instance_status", {
+            "IncludeAllInstances": True,
+            "Filters": [{"Name": "instance-state-name", "Values": list(COUNTED_STATES)}],
+            "PaginationConfig": {"PageSize": PAGE_SIZE},
+        }),
+    }
+    for variant, (operation, params) in calls.items():
+        captured.clear()
+        for _ in client.get_paginator(operation).paginate(**params):
+            pass
+        for n, body in enumerate(captured):
+            (out / f"{variant}-{n:04d}.xml").write_bytes(body)
+        print(f"{variant}: {len(captured)} pages, {sum(map(len, captured)):,} bytes")
+
+
+def recorded_pages(directory, variant):
+    return [p.read_bytes() for p in sorted(Path(directory).glob(f"{variant}-*.xml"))]
+
+
+# ----------------------------
+# Measurement
+# ----------------------------
+def count_states(variant, parsed_pages):
+    counts = {}
+    for page in parsed_pages:
+        if OPERATIONS[variant] == "DescribeInstanceStatus":
+            pairs = ((s["AvailabilityZone"], s["InstanceState"]["Name"]) for s in page.get("InstanceStatuses", []))
+        else:
+            pairs = (
+                (i["Placement"]["AvailabilityZone"], i["State"]["Name"])
+                for r in page.get("Reservations", []) for i in r.get("Instances", [])
+            )
+        for az, state in pairs:
+            if state in COUNTED_STATES:
+                counts[(az, state)] = counts.get((az, state), 0) + 1
+    return counts
+
+
+def measure(model, variant, pages, repeat):
+    shape = model.operation_model(OPERATIONS[variant]).output_shape
+    parser = botocore.parsers.create_parser("ec2")
+    best, parsed = None, None
+    for _ in range(repeat):
+        started = time.process_time()
+        parsed = [parser.parse({"body": body, "headers": {}, "status_code": 200}, shape) for body in pages]
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "pages": len(pages),
+        "bytes": sum(map(len, pages)),
+        "cpu_ms": best * 1000,
+        "counts": count_states(variant, parsed),
+    }
+
+
+def run(args):
+    model = botocore.session.get_session().get_service_model("ec2")
+    fleet = None if args.recorded else list(synthetic_fleet(args.instances, args.seed))
+    source = f"recorded ({args.recorded})" if args.recorded else f"synthetic, {args.instances:,} instances"
+    print(f"EC2 inventory responses: {source}, best of {args.repeat}\n")
+    print(f"{'variant':30} {'pages':>6} {'bytes':>14} {'parse cpu':>12} {'vs old':>8}")
+
+    baseline, results = None, {}
+    for variant in VARIANTS:
+        pages = recorded_pages(args.recorded, variant) if args.recorded else synthetic_pages(fleet, variant)
+        if not pages:
+            print(f"{variant:30} (no recording)")
+            continue
+        result = results[variant] = measure(model, variant, pages, args.repeat)
+        baseline = baseline or result
+        ratio = f"{result['cpu_ms'] / baseline['cpu_ms']:.0%}" if baseline["cpu_ms"] else "n/a"
+        print(f"{variant:30} {result['pages']:>6} {result['bytes']:>14,} {result['cpu_ms']:>9.1f} ms {ratio:>8}")
+
+    # All variants must agree on what the collector stores
+    counts = [r["counts"] for r in results.values()]
+    if any(c != counts[0] for c in counts[1:]):
+        print("\nWARNING: variants disagree on the per-AZ state counts", file=sys.stderr)
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command")
+    rec = sub.add_parser("record", help="record response pages from a real account")
+    rec.add_argument("--region", default="us-east-1")
+    rec.add_argument("--out", default="bench/recorded")
+
+    parser.add_argument("--recorded", help="directory written by 'record' (default: synthetic fleet)")
+    parser.add_argument("--instances", type=int, default=20000, help="synthetic fleet size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Commits, statements and write latency of one collection cycle, per-call vs batched.
+
+A cycle's rows come from the dummy providers plus a synthetic AWS EC2 inventory
+(--regions x --azs). They are written to a scratch database two ways:
+
+- per-call  what the steps did before WriteBatch: for every month / status
+            snapshot an executemany of single-row upserts and a commit, then the
+            history rows and another commit
+- batched   write_batches: multi-row upserts of up to --chunk rows, every cloud in
+            one transaction
+
+Every round writes new values and timestamps, so neither mode skips unchanged rows.
+Commits are counted by the client and cross-checked with the server's Handler_commit.
+Point DB_HOST/DB_NAME/DB_USER/DB_PASS at a scratch MySQL, then from app/worker:
+
+    python -m bench.write_batch --rounds 20 --regions 30 --azs 6 --chunk 1000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+import aws_module
+import azure_module
+import gcp_module
+from batch import WriteBatch, HISTORY_INSERTS, insert_rows, write_batches
+from history import ensure_history_tables
+import snapshot
+from snapshot import SNAPSHOT_TABLES, ensure_heartbeat_table
+
+SNAPSHOT_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS cloud_cost_monthly (
+        cloud VARCHAR(32) NOT NULL,
+        month_year VARCHAR(7) NOT NULL,
+        service VARCHAR(128) NOT NULL,
+        total_amount DECIMAL(18,2) NOT NULL,
+        pct_of_total DECIMAL(5,2) NOT NULL,
+        retrieved_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (cloud, month_year, service),
+        INDEX idx_cost_cloud_retrieved (cloud, retrieved_at, total_amount, pct_of_total),
+        INDEX idx_cost_retrieved (retrieved_at)
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS server_status_agg (
+        cloud VARCHAR(32) NOT NULL,
+        region VARCHAR(32) NOT NULL,
+        az VARCHAR(32) NOT NULL,
+        running INT NOT NULL,
+        stopped INT NOT NULL,
+        `terminated` INT NOT NULL,
+        retrieved_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (cloud, region, az),
+        INDEX idx_status_cloud_retrieved (cloud, retrieved_at, running, stopped, `terminated`),
+        INDEX idx_status_retrieved (retrieved_at)
+    ) ENGINE=InnoDB
+    """,
+)
+
+# The upserts as the steps issued them before, through executemany
+COLUMNS = {"cloud_cost_monthly": 6, "server_status_agg": 7}
+SINGLE_ROW = {
+    table: upsert.replace("{values}", "(" + ",".join(["%s"] * COLUMNS[table]) + ")")
+    for table, (_, upsert) in SNAPSHOT_TABLES.items()
+}
+
+
+class RecordingBatch(WriteBatch):
+    """Keeps every add() call separately, to replay them the per-call way."""
+
+    def __init__(self, cloud):
+        super().__init__(cloud)
+        self.calls = []
+
+    def add(self, table, rows):
+        super().add(table, rows)
+        self.calls.append((table, rows))
+
+
+def aws_status(batch, cloud="AWS", regions=30, azs=6):
+    now = datetime.utcnow()
+    rows = []
+    for r in range(regions):
+        region = f"bench-region-{r:02d}"
+        totals = [0, 0, 0]
+        for a in range(azs):
+            counts = [random.randint(0, 500), random.randint(0, 100), random.randint(0, 20)]
+            totals = [t + c for t, c in zip(totals, counts)]
+            rows.append((cloud, region, f"{region}{'abcdefgh'[a % 8]}", *counts, now))
+        rows.append((cloud, region, "TOTAL", *totals, now))
+    aws_module.store_server_status_agg(batch, rows, cloud=cloud)
+
+
+def stage_cycle(args, stamp):
+    """One cycle's batches, every retrieved_at replaced by ``stamp`` (unique per round)."""
+    steps = {
+        "AWS": [("cost", aws_module.store_dummy_monthly_cost),
+                ("status", lambda b, cloud: aws_status(b, cloud, args.regions, args.azs))],
+        "AZURE": [("cost", azure_module.store_dummy_monthly_cost), ("status", azure_module.store_dummy_server_status)],
+        "GCP": [("cost", gcp_module.store_dummy_monthly_cost), ("status", gcp_module.store_dummy_server_status)],
+    }
+    batches = []
+    for cloud, cloud_steps in steps.items():
+        batch = RecordingBatch(cloud)
+        for step, fn in cloud_steps:
+            fn(batch, cloud=cloud)
+            batch.steps.append(step)
+        batch.calls = [(table, [row[:-1] + (stamp,) for row in rows]) for table, rows in batch.calls]
+        batch.rows = {table: [] for table in SNAPSHOT_TABLES}
+        for table, rows in batch.calls:
+            batch.rows[table].extend(rows)
+        batches.append(batch)
+    return batches
+
+
+def write_per_call(conn, batches):
+    """
+    The write pattern before WriteBatch: each store call committed on its own. On the
+    worker's autocommit connection every statement is a transaction of its own.
+    """
+    started = time.monotonic()
+    cur = conn.cursor()
+    statements = 0
+    for batch in batches:
+        for table, rows in batch.calls:
+            cur.executemany(SINGLE_ROW[table], rows)
+            conn.commit()
+            statements += 1 + insert_rows(cur, HISTORY_INSERTS[table], rows)
+            conn.commit()
+    cur.close()
+    return {"commits": statements, "statements": statements, "seconds": time.monotonic() - started}
+
+
+def server_commits(conn):
+    """Transactions the server committed for this session, implicit (autocommit) ones included."""
+    cur = conn.cursor()
+    cur.execute("SHOW SESSION STATUS LIKE 'Handler_commit'")
+    value = int(cur.fetchone()[1])
+    cur.close()
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--regions", type=int, default=30, help="synthetic AWS regions")
+    parser.add_argument("--azs", type=int, default=6, help="AZs per synthetic AWS region")
+    parser.add_argument("--chunk", type=int, default=1000, help="rows per multi-row statement (WRITE_CHUNK_ROWS)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    conn = mysql.connector.connect(
+        host=os.environ["DB_HOST"],
+        database=os.getenv("DB_NAME", "appdb"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASS", ""),
+        autocommit=True,
+    )
+    cur = conn.cursor()
+    for ddl in SNAPSHOT_DDL:
+        cur.execute(ddl)
+    cur.close()
+    ensure_heartbeat_table(conn)
+    ensure_history_tables(conn)
+
+    # Distinct second-resolution timestamps, so no history row is ignored as a duplicate
+    base = datetime.utcnow().replace(microsecond=0)
+    results = {"per-call": [], "batched": []}
+    rows = 0
+    for i in range(args.rounds):
+        for mode in results:
+            batches = stage_cycle(args, base + timedelta(seconds=2 * i + (mode == "batched")))
+            rows = sum(len(r) for b in batches for r in b.rows.values())
+            before = server_commits(conn)
+            if mode == "per-call":
+                stats = write_per_call(conn, batches)
+            else:
+                # Compare full writes: no row may be skipped as unchanged by chance
+                snapshot._written.clear()
+                stats = write_batches(conn, batches, args.chunk)
+            stats["server_commits"] = server_commits(conn) - before
+            results[mode].append(stats)
+    conn.close()
+
+    print(f"{rows:,} snapshot rows per cycle (plus as many history rows), {args.rounds} rounds\n")
+    print(f"{'mode':10} {'commits':>8} {'server':>8} {'statements':>11} {'p50 ms':>9} {'p95 ms':>9}")
+    for mode, runs in results.items():
+        seconds = sorted(r["seconds"] * 1000 for r in runs)
+        p95 = seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))]
+        print(f"{mode:10} {runs[0]['commits']:>8} {runs[0]['server_commits']:>8} "
+              f"{runs[0]['statements']:>11} {statistics.median(seconds):>9.1f} {p95:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,12 @@ log = logging.getLogger("gcp")
 # ----------------------------
 # GCP Monthly Cost (Dummy)
 # ----------------------------
-def store_dummy_monthly_cost(conn, cloud="GCP"):
+def store_dummy_monthly_cost(batch, cloud="GCP"):
     """
     Dummy GCP monthly cost data with total between $10 and $12.
     ⚠️ Replace with GCP Billing API in the future.
     """
+    cloud = cloud.upper()
     today = datetime.utcnow()
     months = [
         (today.replace(day=1) - timedelta(days=61)).replace(day=1),
@@ -19,7 +20,6 @@ def store_dummy_monthly_cost(conn, cloud="GCP"):
         today.replace(day=1),
     ]
 
-    cur = conn.cursor()
     retrieved_at = datetime.utcnow()
 
     services = ["Compute Engine", "Cloud Storage", "BigQuery", "Cloud SQL", "Cloud Functions"]
@@ -57,33 +57,20 @@ def store_dummy_monthly_cost(conn, cloud="GCP"):
             for s, (cost, pct) in service_costs_pct.items()
         ]
 
-        cur.executemany(
-            """
-            INSERT INTO cloud_cost_monthly (cloud, month_year, service, total_amount, pct_of_total, retrieved_at)
-            VALUES (%s,%s,%s,%s,%s,%s)
-            ON DUPLICATE KEY UPDATE
-                total_amount=VALUES(total_amount),
-                pct_of_total=VALUES(pct_of_total),
-                retrieved_at=VALUES(retrieved_at)
-        """,
-            rows,
-        )
-        conn.commit()
-        log.info(f"[{cloud}] Stored dummy costs for {month_str}: total={total_amount}")
-
-    cur.close()
+        batch.add("cloud_cost_monthly", rows)
+        log.info(f"[{cloud}] Staged dummy costs for {month_str}: total={total_amount}")
 
 
 
 # ----------------------------
 # GCP Server Status (Dummy)
 # ----------------------------
-def store_dummy_server_status(conn, cloud="GCP"):
+def store_dummy_server_status(batch, cloud="GCP"):
     """
     Dummy GCP server status data.
     ⚠️ Replace with GCP Compute Engine API in the future.
     """
-    cur = conn.cursor()
+    cloud = cloud.upper()
     retrieved_at = datetime.utcnow()
 
     # Dummy regions and zones
@@ -121,19 +108,5 @@ def store_dummy_server_status(conn, cloud="GCP"):
     total_terminated = sum(c["terminated"] for c in region_totals.values())
     rows.append((cloud, "ALL", "ALL", total_running, total_stopped, total_terminated, retrieved_at))
 
-    cur.executemany(
-        """
-        INSERT INTO server_status_agg (cloud, region, az, running, stopped, `terminated`, retrieved_at)
-        VALUES (%s,%s,%s,%s,%s,%s,%s)
-        ON DUPLICATE KEY UPDATE
-            running=VALUES(running),
-            stopped=VALUES(stopped),
-            `terminated`=VALUES(`terminated`),
-            retrieved_at=VALUES(retrieved_at)
-    """,
-        rows,
-    )
-
-    conn.commit()
-    cur.close()
-    log.info(f"[{cloud}] Stored {len(rows)} dummy server status rows")
+    batch.add("server_status_agg", rows)
+    log.info(f"[{cloud}] Staged {len(rows)} dummy server status rows")
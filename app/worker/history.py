@@ -0,0 +1,125 @@
+import os
+import logging
+from datetime import datetime
+
+log = logging.getLogger("history")
+
+# ----------------------------
+# Append-only history tables
+# ----------------------------
+# server_status_agg / cloud_cost_monthly only hold the latest snapshot (each run
+# upserts over the previous one). Every run is also appended here, so the backend
+# can chart counts over time. Tables are RANGE partitioned by month on
+# retrieved_at: a range query only opens the months it covers, and old months can
+# be dropped as whole partitions instead of with large DELETEs.
+#
+# retrieved_at is DATETIME (UTC, as written by the worker) because RANGE COLUMNS
+# partitioning does not accept TIMESTAMP. It is part of the primary key, as every
+# unique key of a partitioned table must contain the partitioning column.
+HISTORY_TABLES = {
+    "server_status_history": """
+        CREATE TABLE IF NOT EXISTS server_status_history (
+            cloud VARCHAR(32) NOT NULL,
+            region VARCHAR(32) NOT NULL,
+            az VARCHAR(32) NOT NULL,
+            running INT NOT NULL,
+            stopped INT NOT NULL,
+            `terminated` INT NOT NULL,
+            retrieved_at DATETIME NOT NULL,
+            PRIMARY KEY (cloud, region, az, retrieved_at),
+            INDEX idx_history_retrieved (retrieved_at)
+        ) ENGINE=InnoDB
+        PARTITION BY RANGE COLUMNS (retrieved_at) (
+            PARTITION pmax VALUES LESS THAN (MAXVALUE)
+        )
+    """,
+    "cloud_cost_history": """
+        CREATE TABLE IF NOT EXISTS cloud_cost_history (
+            cloud VARCHAR(32) NOT NULL,
+            month_year VARCHAR(7) NOT NULL,
+            service VARCHAR(128) NOT NULL,
+            total_amount DECIMAL(18,2) NOT NULL,
+            pct_of_total DECIMAL(5,2) NOT NULL,
+            retrieved_at DATETIME NOT NULL,
+            PRIMARY KEY (cloud, month_year, service, retrieved_at),
+            INDEX idx_cost_history_retrieved (retrieved_at)
+        ) ENGINE=InnoDB
+        PARTITION BY RANGE COLUMNS (retrieved_at) (
+            PARTITION pmax VALUES LESS THAN (MAXVALUE)
+        )
+    """,
+}
+
+# Monthly partitions kept ready ahead of the current month, so pmax stays empty
+# and splitting it never has to move rows
+HISTORY_PARTITIONS_AHEAD = int(os.getenv("HISTORY_PARTITIONS_AHEAD", "2"))
+
+# Multi-row inserts, written by batch.write_batches. INSERT IGNORE keeps a retried
+# run from failing on samples it already appended.
+STATUS_HISTORY_INSERT = """
+    INSERT IGNORE INTO server_status_history (cloud, region, az, running, stopped, `terminated`, retrieved_at)
+    VALUES {values}
+"""
+COST_HISTORY_INSERT = """
+    INSERT IGNORE INTO cloud_cost_history (cloud, month_year, service, total_amount, pct_of_total, retrieved_at)
+    VALUES {values}
+"""
+
+
+def month_start(value, offset=0):
+    month = value.month - 1 + offset
+    return datetime(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(start):
+    return f"p{start:%Y%m}"
+
+
+def ensure_history_tables(conn):
+    cur = conn.cursor()
+    for ddl in HISTORY_TABLES.values():
+        cur.execute(ddl)
+    conn.commit()
+    cur.close()
+
+    for table in HISTORY_TABLES:
+        ensure_history_partitions(conn, table)
+
+
+def ensure_history_partitions(conn, table, now=None):
+    """
+    Split pmax so that the current month and HISTORY_PARTITIONS_AHEAD months after it
+    have their own partition (idempotent; a no-op on most runs).
+    """
+    now = now or datetime.utcnow()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT partition_name FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+        """,
+        (table,),
+    )
+    existing = {row[0] for row in cur.fetchall()}
+
+    missing = []
+    for offset in range(HISTORY_PARTITIONS_AHEAD + 1):
+        start = month_start(now, offset)
+        if partition_name(start) not in existing:
+            missing.append(start)
+
+    # Months only ever get added after the newest existing one, so pmax can be split
+    latest = max((name for name in existing if name != "pmax"), default=None)
+    missing = [start for start in missing if latest is None or partition_name(start) > latest]
+    if missing:
+        parts = ", ".join(
+            f"PARTITION {partition_name(start)} VALUES LESS THAN ('{month_start(start, 1):%Y-%m-%d}')"
+            for start in missing
+        )
+        log.info(f"Adding partitions {', '.join(partition_name(s) for s in missing)} to {table}")
+        cur.execute(
+            f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO "
+            f"({parts}, PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+        )
+    cur.close()
+
@@ -0,0 +1,290 @@
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+
+from history import HISTORY_TABLES, month_start
+
+log = logging.getLogger("rollup")
+
+# ----------------------------
+# Downsampled status history
+# ----------------------------
+# At a 60s poll cadence server_status_history grows by ~525k rows per series and
+# year. The compaction job rolls it into hourly and daily buckets holding the
+# sample count plus sum/min/max per counter (sums rather than averages, so
+# buckets can be merged exactly), then deletes raw samples past
+# HISTORY_RAW_RETENTION_DAYS. The backend reads the coarsest table that fits the
+# requested resolution and only aggregates raw samples for the newest, not yet
+# rolled up, stretch. cloud_cost_history is not rolled up (nothing charts it yet);
+# it is only kept for HISTORY_COST_RETENTION_DAYS.
+ROLLUP_TABLES = {
+    "server_status_hourly": "HOUR",
+    "server_status_daily": "DAY",
+}
+
+ROLLUP_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        cloud VARCHAR(32) NOT NULL,
+        region VARCHAR(32) NOT NULL,
+        az VARCHAR(32) NOT NULL,
+        bucket_start DATETIME NOT NULL,
+        samples INT NOT NULL,
+        running_sum BIGINT NOT NULL,
+        running_min INT NOT NULL,
+        running_max INT NOT NULL,
+        stopped_sum BIGINT NOT NULL,
+        stopped_min INT NOT NULL,
+        stopped_max INT NOT NULL,
+        terminated_sum BIGINT NOT NULL,
+        terminated_min INT NOT NULL,
+        terminated_max INT NOT NULL,
+        PRIMARY KEY (cloud, region, az, bucket_start),
+        -- Retention deletes by age across all series
+        INDEX idx_bucket_start (bucket_start)
+    ) ENGINE=InnoDB
+"""
+
+# How far each rollup has been computed: raw samples before rolled_until are final
+ROLLUP_STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS history_rollup_state (
+        rollup VARCHAR(64) NOT NULL PRIMARY KEY,
+        rolled_until DATETIME NOT NULL
+    ) ENGINE=InnoDB
+"""
+
+# Bucket start without DATE_FORMAT, whose % signs the driver's parameter
+# substitution would need escaped
+BUCKET_START = {
+    "HOUR": "TIMESTAMP(DATE(retrieved_at), MAKETIME(HOUR(retrieved_at), 0, 0))",
+    "DAY": "TIMESTAMP(DATE(retrieved_at))",
+}
+
+ROLLUP_INSERT = """
+    INSERT INTO {table} (
+        cloud, region, az, bucket_start, samples,
+        running_sum, running_min, running_max,
+        stopped_sum, stopped_min, stopped_max,
+        terminated_sum, terminated_min, terminated_max
+    )
+    SELECT cloud, region, az, {bucket_start} AS bucket_start, COUNT(*),
+           SUM(running), MIN(running), MAX(running),
+           SUM(stopped), MIN(stopped), MAX(stopped),
+           SUM(`terminated`), MIN(`terminated`), MAX(`terminated`)
+    FROM server_status_history
+    WHERE retrieved_at >= %s AND retrieved_at < %s
+    GROUP BY cloud, region, az, bucket_start
+    ON DUPLICATE KEY UPDATE
+        samples=VALUES(samples),
+        running_sum=VALUES(running_sum), running_min=VALUES(running_min), running_max=VALUES(running_max),
+        stopped_sum=VALUES(stopped_sum), stopped_min=VALUES(stopped_min), stopped_max=VALUES(stopped_max),
+        terminated_sum=VALUES(terminated_sum), terminated_min=VALUES(terminated_min), terminated_max=VALUES(terminated_max)
+"""
+
+ROLLUP_INTERVAL_SECONDS = int(os.getenv("ROLLUP_INTERVAL_SECONDS", "300"))
+# Each transaction covers at most this many hourly / daily buckets, and one pass at
+# most ROLLUP_MAX_BATCHES transactions per table, so catching up on a long backlog
+# never holds locks or builds undo for long
+ROLLUP_BATCH_BUCKETS = {"HOUR": int(os.getenv("ROLLUP_BATCH_HOURS", "6")), "DAY": 1}
+ROLLUP_MAX_BATCHES = int(os.getenv("ROLLUP_MAX_BATCHES", "48"))
+# A sample is stamped when its cloud stages it, but committed only once the cycle's
+# slowest cloud is done (COLLECT_TIMEOUT_SECONDS / COLLECT_TIMEOUT_<CLOUD>), and a
+# cloud the cycle stopped waiting for writes later still. A bucket is rolled up only
+# once it ended this long ago, so no late sample lands behind the watermark, where
+# neither the rollup nor the backend's raw tail would count it. Defaults to twice
+# the longest collection timeout.
+def longest_collect_timeout():
+    timeouts = [int(os.getenv("COLLECT_TIMEOUT_SECONDS", "300"))]
+    timeouts += [int(value) for name, value in os.environ.items() if name.startswith("COLLECT_TIMEOUT_") and value.isdigit()]
+    return max(timeouts)
+
+
+ROLLUP_GRACE_SECONDS = int(os.getenv("ROLLUP_GRACE_SECONDS") or 2 * longest_collect_timeout())
+RETENTION_DELETE_BATCH = int(os.getenv("RETENTION_DELETE_BATCH", "5000"))
+# 0 keeps a table forever
+RETENTION_DAYS = {
+    "server_status_history": int(os.getenv("HISTORY_RAW_RETENTION_DAYS", "14")),
+    "server_status_hourly": int(os.getenv("HISTORY_HOURLY_RETENTION_DAYS", "180")),
+    "server_status_daily": int(os.getenv("HISTORY_DAILY_RETENTION_DAYS", "0")),
+    "cloud_cost_history": int(os.getenv("HISTORY_COST_RETENTION_DAYS", "90")),
+}
+
+
+def ensure_rollup_tables(conn):
+    cur = conn.cursor()
+    for table in ROLLUP_TABLES:
+        cur.execute(ROLLUP_DDL.format(table=table))
+    cur.execute(ROLLUP_STATE_DDL)
+    conn.commit()
+    cur.close()
+
+
+def floor_bucket(value, unit):
+    value = value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if unit == "DAY" else value
+
+
+def bucket_delta(unit, count=1):
+    return timedelta(hours=count) if unit == "HOUR" else timedelta(days=count)
+
+
+# ----------------------------
+# Rollups
+# ----------------------------
+def rolled_until(cur, table):
+    """Watermark of a rollup; without one, start at the oldest raw sample."""
+    cur.execute("SELECT rolled_until FROM history_rollup_state WHERE rollup = %s", (table,))
+    row = cur.fetchone()
+    if row is not None:
+        return row[0]
+    cur.execute("SELECT MIN(retrieved_at) FROM server_status_history")
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def roll_up(conn, table, now=None):
+    """
+    Aggregate complete buckets since the watermark, one bounded transaction per batch.
+    The watermark moves in the same transaction as the rows it covers.
+    """
+    unit = ROLLUP_TABLES[table]
+    end = floor_bucket((now or datetime.utcnow()) - timedelta(seconds=ROLLUP_GRACE_SECONDS), unit)
+    step = bucket_delta(unit, ROLLUP_BATCH_BUCKETS[unit])
+    statement = ROLLUP_INSERT.format(table=table, bucket_start=BUCKET_START[unit])
+
+    cur = conn.cursor()
+    start = rolled_until(cur, table)
+    if start is None:
+        cur.close()
+        return 0
+    start = floor_bucket(start, unit)
+
+    rows = batches = 0
+    while start < end and batches < ROLLUP_MAX_BATCHES:
+        stop = min(start + step, end)
+        conn.start_transaction()
+        try:
+            cur.execute(statement, (start, stop))
+            rows += cur.rowcount
+            cur.execute(
+                """
+                INSERT INTO history_rollup_state (rollup, rolled_until) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE rolled_until=VALUES(rolled_until)
+                """,
+                (table, stop),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        start = stop
+        batches += 1
+
+    cur.close()
+    if batches:
+        log.info(f"Rolled up {table} to {start} ({batches} batches, {rows} rows affected)")
+    return batches
+
+
+# ----------------------------
+# Retention
+# ----------------------------
+def retention_cutoff(cur, table, now):
+    days = RETENTION_DAYS[table]
+    if days <= 0:
+        return None
+    cutoff = now - timedelta(days=days)
+    if table == "server_status_history":
+        # Never delete raw samples a rollup has not consumed yet
+        for rollup in ROLLUP_TABLES:
+            watermark = rolled_until(cur, rollup)
+            if watermark is None:
+                return None
+            cutoff = min(cutoff, watermark)
+    return cutoff
+
+
+def drop_expired_partitions(cur, table, cutoff):
+    """Whole months before the cutoff go as partitions, without a row-by-row DELETE."""
+    cur.execute(
+        """
+        SELECT partition_name FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+        """,
+        (table,),
+    )
+    expired = []
+    for (name,) in cur.fetchall():
+        if name == "pmax":
+            continue
+        start = datetime.strptime(name[1:], "%Y%m")
+        if month_start(start, 1) <= cutoff:
+            expired.append(name)
+    # The current month's partition always ends after the cutoff, so one remains
+    if expired:
+        log.info(f"Dropping partitions {', '.join(expired)} of {table}")
+        cur.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}")
+
+
+def delete_expired(conn, table, now=None):
+    """Delete rows older than the table's retention in transactions of RETENTION_DELETE_BATCH rows."""
+    now = now or datetime.utcnow()
+    cur = conn.cursor()
+    cutoff = retention_cutoff(cur, table, now)
+    if cutoff is None:
+        cur.close()
+        return 0
+
+    column = "bucket_start" if table in ROLLUP_TABLES else "retrieved_at"
+    if table in HISTORY_TABLES:
+        drop_expired_partitions(cur, table, cutoff)
+
+    deleted = 0
+    while True:
+        conn.start_transaction()
+        cur.execute(f"DELETE FROM {table} WHERE {column} < %s LIMIT %s", (cutoff, RETENTION_DELETE_BATCH))
+        count = cur.rowcount
+        conn.commit()
+        deleted += count
+        if count < RETENTION_DELETE_BATCH:
+            break
+
+    cur.close()
+    if deleted:
+        log.info(f"Deleted {deleted} rows from {table} older than {cutoff}")
+    return deleted
+
+
+# ----------------------------
+# Compaction job
+# ----------------------------
+def compact_history(conn, now=None):
+    now = now or datetime.utcnow()
+    for table in ROLLUP_TABLES:
+        roll_up(conn, table, now)
+    for table in RETENTION_DAYS:
+        delete_expired(conn, table, now)
+
+
+def run_compaction_loop(connect, should_stop, interval=None):
+    """
+    Background compaction: every ``interval`` seconds open a connection, compact, close.
+    Runs in its own thread next to the collection loop; failures are logged and retried
+    on the next pass.
+    """
+    interval = interval or ROLLUP_INTERVAL_SECONDS
+    while not should_stop():
+        started = time.monotonic()
+        try:
+            conn = connect()
+            try:
+                compact_history(conn)
+            finally:
+                conn.close()
+        except Exception:
+            log.exception("History compaction failed")
+        log.debug(f"History compaction took {time.monotonic() - started:.1f}s")
+
+        deadline = time.monotonic() + interval
+        while not should_stop() and time.monotonic() < deadline:
+            time.sleep(1)
@@ -0,0 +1,106 @@
+import os
+import hashlib
+import threading
+from datetime import datetime
+
+# ----------------------------
+# Delta upserts
+# ----------------------------
+# server_status_agg and cloud_cost_monthly hold the latest snapshot. Most rows are
+# the same from one run to the next (a stable fleet, closed months), and
+# re-upserting them only rewrites pages, index entries and binlog events. The
+# worker remembers a digest of every row it wrote and only upserts rows whose
+# values changed, so retrieved_at is the time a row last changed. That is also
+# the backend's data version, which now only moves on real changes.
+#
+# When the worker last checked is recorded in worker_heartbeat, one row per cloud
+# and step, written with the data on every run (see batch.write_batches).
+#
+# Rows are rewritten anyway once their last write is SNAPSHOT_MAX_AGE_SECONDS old
+# or from an earlier month. That keeps them inside the backend's date windows
+# (which start on a month boundary) and repairs rows changed behind the worker's
+# back. A restart forgets the digests, so the first run writes everything.
+SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("SNAPSHOT_MAX_AGE_SECONDS", "21600"))
+
+COST_UPSERT = """
+    INSERT INTO cloud_cost_monthly (cloud, month_year, service, total_amount, pct_of_total, retrieved_at)
+    VALUES {values}
+    ON DUPLICATE KEY UPDATE
+        total_amount=VALUES(total_amount),
+        pct_of_total=VALUES(pct_of_total),
+        retrieved_at=VALUES(retrieved_at)
+"""
+STATUS_UPSERT = """
+    INSERT INTO server_status_agg (cloud, region, az, running, stopped, `terminated`, retrieved_at)
+    VALUES {values}
+    ON DUPLICATE KEY UPDATE
+        running=VALUES(running),
+        stopped=VALUES(stopped),
+        `terminated`=VALUES(`terminated`),
+        retrieved_at=VALUES(retrieved_at)
+"""
+
+# table -> (number of leading primary key columns, upsert); retrieved_at is the last column
+SNAPSHOT_TABLES = {
+    "cloud_cost_monthly": (3, COST_UPSERT),  # cloud, month_year, service
+    "server_status_agg": (3, STATUS_UPSERT),  # cloud, region, az
+}
+
+HEARTBEAT_DDL = """
+    CREATE TABLE IF NOT EXISTS worker_heartbeat (
+        cloud VARCHAR(32) NOT NULL,
+        step VARCHAR(32) NOT NULL,
+        checked_at DATETIME NOT NULL,
+        PRIMARY KEY (cloud, step)
+    ) ENGINE=InnoDB
+"""
+
+HEARTBEAT_UPSERT = """
+    INSERT INTO worker_heartbeat (cloud, step, checked_at) VALUES {values}
+    ON DUPLICATE KEY UPDATE checked_at=VALUES(checked_at)
+"""
+
+# (table, key) -> (digest of the values, retrieved_at written)
+_written = {}
+# Clouds are collected on separate threads
+_written_lock = threading.Lock()
+
+
+def ensure_heartbeat_table(conn):
+    cur = conn.cursor()
+    cur.execute(HEARTBEAT_DDL)
+    conn.commit()
+    cur.close()
+
+
+def row_digest(values):
+    return hashlib.blake2b(repr(tuple(values)).encode(), digest_size=16).digest()
+
+
+def changed_rows(table, rows, now=None):
+    """The rows that differ from what was last written (ignoring retrieved_at) or are due a refresh."""
+    now = now or datetime.utcnow()
+    width = SNAPSHOT_TABLES[table][0]
+    changed = []
+    with _written_lock:
+        for row in rows:
+            previous = _written.get((table, row[:width]))
+            if previous is not None:
+                digest, written_at = previous
+                fresh = (
+                    (now - written_at).total_seconds() < SNAPSHOT_MAX_AGE_SECONDS
+                    and (written_at.year, written_at.month) == (now.year, now.month)
+                )
+                if fresh and digest == row_digest(row[width:-1]):
+                    continue
+            changed.append(row)
+    return changed
+
+
+def remember_rows(table, rows):
+    """Record rows as written; call once they are committed."""
+    width = SNAPSHOT_TABLES[table][0]
+    with _written_lock:
+        for row in rows:
+            _written[(table, row[:width])] = (row_digest(row[width:-1]), row[-1])
+
@@ -4,6 +4,8 @@ import json
 import time
 import signal
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone, timedelta
 
 import boto3
@@ -26,6 +28,10 @@ from gcp_module import (
     store_dummy_monthly_cost as gcp_cost,
     store_dummy_server_status as gcp_status,
 )
+from batch import WriteBatch, write_batches
+from history import ensure_history_tables
+from rollup import ensure_rollup_tables, run_compaction_loop
+from snapshot import ensure_heartbeat_table
 
 # ----------------------------
 # Logging
@@ -45,6 +51,11 @@ SSM_PARAM_NAME = os.getenv("SSM_PARAM_NAME", "myapp_database_credentials")
 DB_HOST = os.getenv("DB_HOST")
 DB_NAME = os.getenv("DB_NAME", "appdb")
 POLL_INTERVAL_SECONDS = int(os.getenv("POLL_INTERVAL_SECONDS", "60000"))
+# Clouds collected at the same time, each on its own DB connection
+COLLECT_MAX_WORKERS = int(os.getenv("COLLECT_MAX_WORKERS", "3"))
+# Seconds a cloud may take before the cycle stops waiting for it;
+# COLLECT_TIMEOUT_<CLOUD> (e.g. COLLECT_TIMEOUT_AWS) overrides it per cloud
+COLLECT_TIMEOUT_SECONDS = int(os.getenv("COLLECT_TIMEOUT_SECONDS", "300"))
 
 if not DB_HOST:
     log.error("DB_HOST is required (RDS endpoint).")
@@ -118,7 +129,9 @@ def ensure_tables(conn):
             total_amount DECIMAL(18,2) NOT NULL,
             pct_of_total DECIMAL(5,2) NOT NULL,
             retrieved_at TIMESTAMP NOT NULL,
-            PRIMARY KEY (cloud, month_year, service)
+            PRIMARY KEY (cloud, month_year, service),
+            INDEX idx_cost_cloud_retrieved (cloud, retrieved_at, total_amount, pct_of_total),
+            INDEX idx_cost_retrieved (retrieved_at)
         ) ENGINE=InnoDB;
     """)
     
@@ -131,13 +144,73 @@ def ensure_tables(conn):
             stopped INT NOT NULL,
             `terminated` INT NOT NULL,
             retrieved_at TIMESTAMP NOT NULL,
-            PRIMARY KEY (cloud, region, az)
+            PRIMARY KEY (cloud, region, az),
+            INDEX idx_status_cloud_retrieved (cloud, retrieved_at, running, stopped, `terminated`),
+            INDEX idx_status_retrieved (retrieved_at)
         ) ENGINE=InnoDB;
     """)
     
     conn.commit()
     cur.close()
 
+    ensure_heartbeat_table(conn)
+    ensure_history_tables(conn)
+    ensure_rollup_tables(conn)
+    upgrade_schema(conn)
+
+# ----------------------------
+# Schema upgrades
+# ----------------------------
+# (cloud, retrieved_at) leads so the backend's "cloud = ? AND retrieved_at range
+# ORDER BY retrieved_at DESC" is an index range scan without filesort. The
+# remaining columns plus the InnoDB primary key suffix make the index covering.
+# The plain retrieved_at index implicitly ends with the primary key, which is
+# exactly the (retrieved_at, pk) order the admin endpoint's keyset pages use.
+SCHEMA_INDEXES = [
+    # (table, index, columns, upper-case cloud names first)
+    ("cloud_cost_monthly", "idx_cost_cloud_retrieved", "cloud, retrieved_at, total_amount, pct_of_total", True),
+    ("server_status_agg", "idx_status_cloud_retrieved", "cloud, retrieved_at, running, stopped, `terminated`", True),
+    ("cloud_cost_monthly", "idx_cost_retrieved", "retrieved_at", True),
+    ("server_status_agg", "idx_status_retrieved", "retrieved_at", True),
+    # Lets the history retention job delete expired samples in batches without scanning.
+    # History is only ever written upper-cased, and is too large to rewrite on upgrade.
+    ("server_status_history", "idx_history_retrieved", "retrieved_at", False),
+    ("cloud_cost_history", "idx_cost_history_retrieved", "retrieved_at", False),
+    # Same for the rollups' retention; their PK leads with the series, not the time
+    ("server_status_hourly", "idx_bucket_start", "bucket_start", False),
+    ("server_status_daily", "idx_bucket_start", "bucket_start", False),
+]
+
+def upgrade_schema(conn):
+    """
+    Bring tables created by older worker versions up to date (idempotent).
+    Older snapshot rows may carry mixed-case cloud names ("Azure"); they are
+    upper-cased once, together with adding the index, so the backend can filter
+    with equality.
+    """
+    cur = conn.cursor()
+    for table, index, columns, normalize in SCHEMA_INDEXES:
+        cur.execute(
+            """
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+            LIMIT 1
+            """,
+            (table, index),
+        )
+        if cur.fetchone() is not None:
+            continue
+
+        if normalize:
+            log.info(f"Upgrading {table}: normalizing cloud names and adding {index}")
+            cur.execute(f"UPDATE {table} SET cloud = UPPER(cloud) WHERE BINARY cloud <> UPPER(cloud)")
+        else:
+            log.info(f"Upgrading {table}: adding {index}")
+        cur.execute(f"ALTER TABLE {table} ADD INDEX {index} ({columns})")
+
+    conn.commit()
+    cur.close()
+
 # ----------------------------
 # Utility: Print table rows
 # ----------------------------
@@ -152,6 +225,109 @@ def print_table(conn, table_name):
         print("\t".join(str(r) for r in row))
     cur.close()
 
+# ----------------------------
+# Concurrent collection
+# ----------------------------
+# One task per cloud, running that cloud's steps in order. Clouds run in parallel
+# (at most COLLECT_MAX_WORKERS at once), so a cycle takes as long as the slowest
+# cloud rather than the sum of all of them. Steps only stage rows in their cloud's
+# WriteBatch; the cycle then writes every cloud that finished in one transaction.
+PROVIDERS = {
+    "AWS": [("cost", aws_cost), ("status", collect_ec2_status)],
+    "AZURE": [("cost", azure_cost), ("status", azure_status)],
+    "GCP": [("cost", gcp_cost), ("status", gcp_status)],
+}
+
+_executor = ThreadPoolExecutor(max_workers=COLLECT_MAX_WORKERS, thread_name_prefix="collect")
+# Cloud -> future still running from an earlier cycle (a thread cannot be stopped)
+_in_flight = {}
+
+
+def provider_timeout(cloud):
+    return int(os.getenv(f"COLLECT_TIMEOUT_{cloud}", COLLECT_TIMEOUT_SECONDS))
+
+
+def collect_provider(cloud, steps, batch):
+    """
+    Run one cloud's steps, staging their rows in ``batch``. A failing step is reported
+    and the next step still runs; returns ({step: error message or None}, seconds taken).
+    """
+    started = time.monotonic()
+    errors = {}
+    for step, fn in steps:
+        try:
+            fn(batch, cloud=cloud)
+            batch.steps.append(step)
+            errors[step] = None
+        except Exception as e:
+            log.exception(f"[{cloud}] {step} collection failed")
+            errors[step] = f"{type(e).__name__}: {e}"
+
+    if not batch.close():
+        # The cycle stopped waiting for this cloud and nobody reads this result any
+        # more: write its rows on their own, and report a failure here or never
+        try:
+            conn = get_db_connection()
+            try:
+                write_batches(conn, [batch])
+            finally:
+                conn.close()
+        except Exception:
+            log.exception(f"[{cloud}] late write failed")
+    return errors, round(time.monotonic() - started, 2)
+
+
+def collect_all(conn, providers=None):
+    """
+    Collect every cloud concurrently, wait for each up to its own timeout, then write
+    the rows of all clouds that finished in one transaction on ``conn``.
+
+    Returns {cloud: {"status", "seconds", "errors"}} with status ok, error (a step or
+    the write failed), timeout (still running; it writes its rows when it finishes)
+    or skipped (the previous cycle's run of that cloud has not finished yet).
+    """
+    providers = providers or PROVIDERS
+    started = time.monotonic()
+    results, futures, batches = {}, {}, {}
+
+    for cloud, steps in providers.items():
+        previous = _in_flight.get(cloud)
+        if previous is not None and not previous.done():
+            log.warning(f"[{cloud}] Previous collection still running; skipping this cycle")
+            results[cloud] = {"status": "skipped", "seconds": 0.0, "errors": {}}
+            continue
+        batches[cloud] = WriteBatch(cloud)
+        futures[cloud] = _in_flight[cloud] = _executor.submit(collect_provider, cloud, steps, batches[cloud])
+
+    for cloud, future in futures.items():
+        remaining = provider_timeout(cloud) - (time.monotonic() - started)
+        done, _ = wait([future], timeout=max(0, remaining))
+        if not done and batches[cloud].abandon():
+            log.error(f"[{cloud}] Collection exceeded {provider_timeout(cloud)}s; not waiting for it")
+            results[cloud] = {"status": "timeout", "seconds": round(time.monotonic() - started, 2), "errors": {}}
+            del batches[cloud]
+            continue
+        try:
+            errors, seconds = future.result()
+            status = "error" if any(errors.values()) else "ok"
+        except Exception as e:
+            log.exception(f"[{cloud}] Collection failed")
+            errors, seconds, status = {"collect": f"{type(e).__name__}: {e}"}, None, "error"
+        results[cloud] = {"status": status, "seconds": seconds, "errors": errors}
+
+    try:
+        write_batches(conn, list(batches.values()))
+    except Exception as e:
+        log.exception(f"Writing {', '.join(batches)} failed")
+        for cloud in batches:
+            results[cloud]["status"] = "error"
+            results[cloud]["errors"]["write"] = f"{type(e).__name__}: {e}"
+
+    summary = ", ".join(f"{cloud}={r['status']} ({r['seconds']}s)" for cloud, r in results.items())
+    log.info(f"Collection finished in {time.monotonic() - started:.2f}s: {summary}")
+    return results
+
+
 # ----------------------------
 # Main loop function 
 # ----------------------------
@@ -159,34 +335,30 @@ def run_once():
     conn = get_db_connection()
     ensure_tables(conn)
 
-    # ----------------------------
-    # AWS (real/dummy mix, unchanged)
-    # ----------------------------
-    aws_cost(conn, cloud="AWS")
-    collect_ec2_status(conn, cloud="AWS")
-
-    # ----------------------------
-    # Azure (dummy only)
-    # ----------------------------
-    azure_cost(conn, cloud="Azure")
-    azure_status(conn, cloud="Azure")
-
-    # ----------------------------
-    # GCP (dummy only)
-    # ----------------------------
-    gcp_cost(conn, cloud="GCP")
-    gcp_status(conn, cloud="GCP")
+    # AWS (real/dummy mix), Azure and GCP (dummy only), in parallel
+    results = collect_all(conn)
 
     # Debug print
     print_table(conn, "cloud_cost_monthly")
     print_table(conn, "server_status_agg")
 
     conn.close()
+    return results
 
 
 def main():
+    compaction = None
     while not _shutdown:
         run_once()
+        if compaction is None:
+            # Started once the first run has created the tables; rolls up and expires history
+            compaction = threading.Thread(
+                target=run_compaction_loop,
+                args=(get_db_connection, lambda: _shutdown),
+                name="history-compaction",
+                daemon=True,
+            )
+            compaction.start()
         if _shutdown:
             break
         log.info(f"Sleeping {POLL_INTERVAL_SECONDS}s before next run...")